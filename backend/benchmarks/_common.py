@@ -0,0 +1,145 @@
+"""
+Utilidades compartidas por los benchmarks
+
+Los benchmarks se ejecutan desde el directorio backend/ contra una base de
+datos SQLite temporal, por ejemplo:
+
+    python -m benchmarks.bench_async_db --requests 2000 --concurrency 50
+
+IMPORTANTE: configure_environment() debe llamarse antes de importar
+módulos de la aplicación, porque database.py lee DATABASE_URL al importarse
+(los engines se crean en el primer uso).
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(db_path: str = None, **extra_env: str) -> str:
+    """
+    Configura las variables de entorno para correr la app contra SQLite local
+
+    Args:
+        db_path (str, optional): Ruta del archivo SQLite (temporal por defecto)
+        **extra_env: Variables de entorno adicionales
+
+    Returns:
+        str: Ruta del archivo SQLite usado
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="pool_banorte_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("SQL_ECHO", "false")
+    for key, value in extra_env.items():
+        os.environ[key] = str(value)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return db_path
+
+
+def create_schema() -> None:
+    """Crea las tablas en la base de datos configurada (engine síncrono)"""
+    import models  # noqa: F401  (registra los modelos en Base.metadata)
+    from database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_users(count: int, batch_size: int = 10000, start: int = 0) -> None:
+    """
+    Inserta `count` usuarios sintéticos con executemany (sin bcrypt)
+
+    Args:
+        count (int): Número de usuarios a insertar
+        batch_size (int): Filas por lote
+        start (int): Índice del primer usuario (para sembrar incrementalmente)
+    """
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import insert
+
+    from database import engine
+    from models import User
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        for offset in range(start, start + count, batch_size):
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "email": f"user{i}@example.com",
+                    "name": f"Usuario {i}",
+                    "password": "x",
+                    "created_at": base + timedelta(milliseconds=i),
+                }
+                for i in range(offset, min(offset + batch_size, start + count))
+            ]
+            conn.execute(insert(User), rows)
+
+
+async def dispose_engines() -> None:
+    """Cierra las conexiones de los pools (los hilos de aiosqlite impiden terminar el proceso)"""
+    import database
+
+    await database.dispose_engines()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (pct entre 0 y 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Resume latencias (en segundos) como milisegundos y throughput"""
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_concurrent(
+    operation: Callable[[int], Awaitable[None]],
+    total: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """
+    Ejecuta `operation` `total` veces con a lo sumo `concurrency` en vuelo
+
+    Args:
+        operation: Corrutina que recibe el índice de la iteración
+        total (int): Número total de operaciones
+        concurrency (int): Operaciones concurrentes máximas
+
+    Returns:
+        dict: Resumen de latencias y throughput (ver summarize)
+    """
+    latencies: List[float] = []
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
@@ -0,0 +1,96 @@
+"""
+Benchmark de la capa de base de datos asíncrona
+
+Mide requests por segundo de endpoints autenticados (in-process, vía ASGI)
+y el bloqueo del event loop al consultar con Session síncrona vs AsyncSession.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_async_db --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, run_concurrent
+
+
+async def measure_loop_lag(operation, total: int, concurrency: int) -> dict:
+    """Ejecuta operaciones mientras un latido mide el retraso máximo del event loop"""
+    max_lag = 0.0
+    running = True
+
+    async def heartbeat() -> None:
+        nonlocal max_lag
+        interval = 0.001
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - start - interval)
+
+    beat = asyncio.create_task(heartbeat())
+    summary = await run_concurrent(operation, total, concurrency)
+    running = False
+    await beat
+    summary["max_loop_lag_ms"] = round(max_lag * 1000, 3)
+    return summary
+
+
+async def run_benchmark(total: int, concurrency: int) -> dict:
+    import httpx
+
+    from database import AsyncSessionLocal, SessionLocal
+    from main import app
+    from services.user_services import AsyncUserService, UserService
+
+    email = "bench@example.com"
+    results = {}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        response = await client.post(
+            "/auth/register",
+            json={"email": email, "name": "Bench User", "password": "benchpass123"}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def get_me(_: int) -> None:
+            (await client.get("/auth/me", headers=headers)).raise_for_status()
+
+        async def list_users(_: int) -> None:
+            (await client.get("/users/", headers=headers)).raise_for_status()
+
+        results["GET /auth/me"] = await run_concurrent(get_me, total, concurrency)
+        results["GET /users/"] = await run_concurrent(list_users, total, concurrency)
+
+    # Consulta directa al servicio: Session síncrona (bloquea el loop) vs AsyncSession
+    async def sync_lookup(_: int) -> None:
+        with SessionLocal() as db:
+            UserService.get_user_by_email(db, email)
+
+    async def async_lookup(_: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await AsyncUserService.get_user_by_email(db, email)
+
+    results["UserService.get_user_by_email (sync)"] = await measure_loop_lag(sync_lookup, total, concurrency)
+    results["AsyncUserService.get_user_by_email"] = await measure_loop_lag(async_lookup, total, concurrency)
+    return results
+
+
+async def main(total: int, concurrency: int) -> dict:
+    try:
+        return await run_benchmark(total, concurrency)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    configure_environment()
+    create_schema()
+    print(json.dumps(asyncio.run(main(args.requests, args.concurrency)), indent=2))
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark del costo de autenticación por request
+
+Compara verify_token con y sin la caché de tokens verificados, y el costo
+completo de GET /auth/me (in-process, vía ASGI) con las cachés de tokens y
+de principals desactivadas vs activadas.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_auth_overhead --iterations 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, run_concurrent
+
+
+def time_verify_token(token: str, iterations: int) -> dict:
+    """Mide el costo por llamada de verify_token (en microsegundos)"""
+    from utils import auth
+
+    auth.verify_token(token)  # calentar la caché (si está activa)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        auth.verify_token(token)
+    elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "per_call_us": round(elapsed / iterations * 1e6, 3)}
+
+
+async def time_get_me(token: str, total: int, concurrency: int) -> dict:
+    import httpx
+
+    from main import app
+
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def get_me(_: int) -> None:
+            (await client.get("/auth/me", headers=headers)).raise_for_status()
+
+        await get_me(0)
+        return await run_concurrent(get_me, total, concurrency)
+
+
+def set_caches(enabled: bool) -> None:
+    from services.principal_cache import principal_cache
+    from utils import auth
+
+    auth.TOKEN_CACHE_ENABLED = enabled
+    auth.purge_token_cache()
+    principal_cache.enabled = enabled
+    principal_cache.clear()
+
+
+async def run_benchmark(iterations: int, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    from main import app
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        response = await client.post(
+            "/auth/register",
+            json={"email": "bench@example.com", "name": "Bench User", "password": "benchpass123"}
+        )
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    results = {}
+    for label, enabled in (("before_no_cache", False), ("after_cached", True)):
+        set_caches(enabled)
+        results[label] = {
+            "verify_token": time_verify_token(token, iterations),
+            "GET /auth/me": await time_get_me(token, requests, concurrency),
+        }
+    return results
+
+
+async def main(iterations: int, requests: int, concurrency: int) -> dict:
+    try:
+        return await run_benchmark(iterations, requests, concurrency)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_environment(BCRYPT_ROUNDS="4")
+    create_schema()
+    print(json.dumps(asyncio.run(main(args.iterations, args.requests, args.concurrency)), indent=2))
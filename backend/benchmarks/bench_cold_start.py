@@ -0,0 +1,127 @@
+"""
+Benchmark de arranque en frío (cold start)
+
+Mide, en procesos nuevos de Python (como en cada cold start de Vercel):
+- El tiempo de `import index` reportado por `python -X importtime`, con los
+  módulos más costosos (tiempo acumulado).
+- El tiempo hasta la primera respuesta: importar la app y atender
+  GET /health-simple con una llamada ASGI directa (sin servidor HTTP).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_cold_start --runs 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from benchmarks._common import BACKEND_DIR, configure_environment
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# Se ejecuta en un proceso nuevo: el tiempo incluye el intérprete ya iniciado,
+# la importación de la app y la primera request completa.
+FIRST_RESPONSE_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from index import app
+imported = time.perf_counter()
+
+async def first_request():
+    messages = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health-simple", "raw_path": b"/health-simple",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_request())
+done = time.perf_counter()
+print(json.dumps({"status": status, "import_ms": (imported - start) * 1000, "first_response_ms": (done - start) * 1000}))
+"""
+
+
+def run_python(args: list) -> subprocess.CompletedProcess:
+    """Ejecuta el intérprete actual en backend/ con el entorno configurado"""
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_importtime(top: int) -> dict:
+    """
+    Parsea la salida de `-X importtime` para `import index`
+
+    Returns:
+        dict: Tiempo total (ms) y los `top` módulos con mayor tiempo acumulado
+    """
+    result = run_python(["-X", "importtime", "-c", "import index"])
+    modules = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append((name, int(self_us), int(cumulative_us)))
+        if name == "index":
+            total_us = int(cumulative_us)
+
+    modules.sort(key=lambda item: item[2], reverse=True)
+    return {
+        "import_index_ms": round(total_us / 1000, 2),
+        "top_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cumulative_us / 1000, 2)}
+            for name, self_us, cumulative_us in modules[:top]
+        ],
+    }
+
+
+def measure_first_response(runs: int) -> dict:
+    """Mediana y extremos del tiempo hasta la primera respuesta sobre `runs` procesos"""
+    samples = [json.loads(run_python(["-c", FIRST_RESPONSE_SCRIPT]).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    statuses = {sample["status"] for sample in samples}
+    if statuses != {200}:
+        raise RuntimeError(f"GET /health-simple respondió {statuses}")
+
+    import_ms = [sample["import_ms"] for sample in samples]
+    first_ms = [sample["first_response_ms"] for sample in samples]
+    return {
+        "runs": runs,
+        "import_median_ms": round(statistics.median(import_ms), 2),
+        "first_response_median_ms": round(statistics.median(first_ms), 2),
+        "first_response_min_ms": round(min(first_ms), 2),
+        "first_response_max_ms": round(max(first_ms), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    configure_environment()
+    print(json.dumps({
+        "importtime": measure_importtime(args.top),
+        "time_to_first_response": measure_first_response(args.runs),
+    }, indent=2))
@@ -0,0 +1,71 @@
+"""
+Benchmark de memoria de la exportación en streaming de usuarios
+
+Recorre AsyncUserService.stream_users serializando cada lote como lo hace
+GET /users/export y reporta el pico de memoria (tracemalloc) para varios
+tamaños de tabla. Con streaming, el pico debe mantenerse constante.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_export --sizes 100000,1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, seed_users
+
+
+async def export_once(format: str) -> dict:
+    from database import AsyncSessionLocal
+    from services.user_services import AsyncUserService
+    from utils.export import csv_chunk, ndjson_chunk
+
+    fields = AsyncUserService.EXPORT_FIELDS
+    rows = 0
+    total_bytes = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        async for batch in AsyncUserService.stream_users(db):
+            chunk = csv_chunk(batch) if format == "csv" else ndjson_chunk(fields, batch)
+            rows += len(batch)
+            total_bytes += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "bytes": total_bytes,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0,
+        "peak_memory_mb": round(peak / 1024 / 1024, 3),
+    }
+
+
+async def main(sizes: list, format: str) -> list:
+    results = []
+    seeded = 0
+    try:
+        for size in sorted(sizes):
+            # Sembrar incrementalmente hasta el siguiente tamaño
+            seed_users(size - seeded, start=seeded)
+            seeded = size
+            results.append(await export_once(format))
+    finally:
+        await dispose_engines()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50000,200000", help="Tamaños de tabla separados por coma")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    configure_environment()
+    create_schema()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(asyncio.run(main(sizes, args.format)), indent=2))
@@ -0,0 +1,77 @@
+"""
+Benchmark de paginación: offset vs cursor (keyset)
+
+Siembra usuarios sintéticos y mide la latencia de obtener la página N
+(por defecto la 1000 con limit=100) con `skip`/`limit` y con cursor.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pagination --users 120000 --page 1000 --limit 100
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, seed_users, summarize
+
+
+async def run_benchmark(page: int, limit: int, repeat: int) -> dict:
+    from sqlalchemy import select
+
+    from database import AsyncSessionLocal
+    from models import User
+    from services.user_services import AsyncUserService
+    from utils.pagination import encode_cursor
+
+    skip = (page - 1) * limit
+    async with AsyncSessionLocal() as db:
+        # Cursor de la última fila de la página anterior (lo que el cliente tendría)
+        last = (await db.execute(
+            select(User.created_at, User.id).order_by(User.created_at, User.id).offset(skip - 1).limit(1)
+        )).one()
+        cursor = encode_cursor(last.created_at, last.id)
+
+        async def measure(operation) -> dict:
+            await operation()  # calentar
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                await operation()
+                latencies.append(time.perf_counter() - t0)
+            return summarize(latencies, time.perf_counter() - start)
+
+        offset_page = await AsyncUserService.get_users(db, skip=skip, limit=limit)
+        cursor_page, _ = await AsyncUserService.get_users_page(db, limit=limit, cursor=cursor)
+        assert len(offset_page) == len(cursor_page) == limit
+
+        return {
+            "page": page,
+            "limit": limit,
+            "offset": await measure(lambda: AsyncUserService.get_users(db, skip=skip, limit=limit)),
+            "cursor": await measure(lambda: AsyncUserService.get_users_page(db, limit=limit, cursor=cursor)),
+        }
+
+
+async def main(page: int, limit: int, repeat: int) -> dict:
+    try:
+        return await run_benchmark(page, limit, repeat)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=120000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    if args.users < args.page * args.limit:
+        parser.error("--users debe ser al menos page * limit")
+
+    configure_environment()
+    create_schema()
+    seed_users(args.users)
+    print(json.dumps(asyncio.run(main(args.page, args.limit, args.repeat)), indent=2))
@@ -0,0 +1,140 @@
+"""
+Benchmark del listado de pools: consultas por página y latencia
+
+Siembra organizadores y pools sintéticos y, para cada tamaño de página, pide
+la primera página y una página intermedia (por cursor) de los listados
+"públicos" y "mis pools". Cuenta las sentencias SQL de cada página con un
+listener de SQLAlchemy y falla (código de salida 1) si el número de consultas
+crece con el tamaño de la página, es decir, si el organizador dejó de
+cargarse en bloque y apareció un N+1.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pool_listing --organizers 2000 --pools 50000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, seed_users, summarize
+
+PAGE_SIZES = (10, 50, 100)
+EXPECTED_QUERIES = 2  # pools + organizadores (selectinload)
+
+
+def seed_pools(count: int, batch_size: int = 10000) -> None:
+    """Inserta `count` pools repartidos entre los usuarios (el 10% para el primero)"""
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import insert, select
+
+    from database import engine
+    from models import Pool, User
+
+    rng = random.Random(17)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        organizer_ids = list(conn.execute(select(User.id)).scalars())
+        for offset in range(0, count, batch_size):
+            rows = [
+                {
+                    "organizer_id": organizer_ids[0] if i % 10 == 0 else rng.choice(organizer_ids),
+                    "name": f"Pool {i}",
+                    "is_active": rng.random() < 0.8,
+                    "status": rng.choice(("active", "active", "completed", "cancelled")),
+                    "visibility": rng.choice(("private", "public", "link_only")),
+                    "target_amount": 1000,
+                    "current_amount": 0,
+                    "contributor_count": 0,
+                    "created_at": base + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + batch_size, count))
+            ]
+            conn.execute(insert(Pool), rows)
+
+
+async def run_benchmark(repeat: int) -> dict:
+    from sqlalchemy import event, func, select
+
+    from database import AsyncSessionLocal, async_engine
+    from models import Pool
+    from services.pool_services import PoolService
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    async with AsyncSessionLocal() as db:
+        # El organizador con más pools, para el listado "mis pools"
+        organizer_id = (await db.execute(
+            select(Pool.organizer_id).group_by(Pool.organizer_id).order_by(func.count().desc()).limit(1)
+        )).scalar_one()
+
+        scenarios = {
+            "public": {"visibility": "public", "status": "active"},
+            "mine": {"organizer_id": organizer_id, "is_active": True},
+        }
+        results = {}
+        failures = []
+        for name, filters in scenarios.items():
+            for limit in PAGE_SIZES:
+                # Segunda página: ejercita también el filtro del cursor
+                _, cursor = await PoolService.list_pools(db, limit=limit, **filters)
+
+                pages = [("first", None)] + ([("next", cursor)] if cursor else [])
+                for page, page_cursor in pages:
+                    db.expunge_all()
+                    statements.clear()
+                    pools, _ = await PoolService.list_pools(db, limit=limit, cursor=page_cursor, **filters)
+                    queries = len(statements)
+                    # Acceder al organizador no debe emitir consultas (lazy="raise")
+                    organizers = {pool.organizer.id for pool in pools if pool.organizer}
+                    if queries != EXPECTED_QUERIES:
+                        failures.append(f"{name} limit={limit} {page}: {queries} consultas")
+
+                    latencies = []
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        db.expunge_all()
+                        t0 = time.perf_counter()
+                        await PoolService.list_pools(db, limit=limit, cursor=page_cursor, **filters)
+                        latencies.append(time.perf_counter() - t0)
+
+                    results[f"{name}/limit={limit}/{page}"] = {
+                        "rows": len(pools),
+                        "organizers": len(organizers),
+                        "queries": queries,
+                        **summarize(latencies, time.perf_counter() - start),
+                    }
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    return {"expected_queries_per_page": EXPECTED_QUERIES, "results": results, "failures": failures}
+
+
+async def main(repeat: int) -> dict:
+    try:
+        return await run_benchmark(repeat)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--organizers", type=int, default=2000)
+    parser.add_argument("--pools", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    configure_environment()
+    create_schema()
+    seed_users(args.organizers)
+    seed_pools(args.pools)
+    report = asyncio.run(main(args.repeat))
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failures"] else 0)
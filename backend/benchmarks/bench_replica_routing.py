@@ -0,0 +1,174 @@
+"""
+Prueba local del ruteo a la réplica de lectura con dos archivos SQLite
+
+Crea un primario y una réplica SQLite; un hilo "replica" el primario sobre
+la réplica cada --lag segundos (API de backup de sqlite3), simulando el
+atraso de una réplica real. La app corre en proceso (httpx + ASGI) y cada
+cliente: se registra, lee su perfil, cambia su nombre y lo vuelve a leer
+enseguida, y después lee la lista de usuarios pasada la ventana de
+read-your-writes.
+
+Reporta las consultas por engine y los motivos de ruteo (desde /metrics) y
+cuántas lecturas devolvieron un dato anterior a la propia escritura (debe
+ser 0 mientras READ_YOUR_WRITES_SECONDS sea mayor que el atraso).
+
+Con dos PostgreSQL locales con replicación configurada se usa
+--database-url y --replica-url (sin el hilo de copia).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_replica_routing --clients 20 --lag 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks._common import configure_environment, create_schema, dispose_engines, seed_users
+
+PASSWORD = "replica123"
+
+
+class SQLiteReplicator(threading.Thread):
+    """Copia el archivo primario sobre la réplica periódicamente"""
+
+    def __init__(self, primary_path: str, replica_path: str, lag: float):
+        super().__init__(daemon=True)
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.lag = lag
+        self.copies = 0
+        self._stop_event = threading.Event()
+
+    def copy(self) -> None:
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path, timeout=30)
+        try:
+            source.backup(target)
+            self.copies += 1
+        finally:
+            source.close()
+            target.close()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.lag):
+            try:
+                self.copy()
+            except sqlite3.OperationalError:
+                pass  # Réplica ocupada: se reintenta en el próximo ciclo
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def parse_metrics(text: str, prefix: str) -> dict:
+    """Series de una métrica del formato de texto de Prometheus"""
+    series = {}
+    for line in text.splitlines():
+        if line.startswith(prefix + "{"):
+            labels, value = line.rsplit(" ", 1)
+            series[labels[len(prefix):]] = float(value)
+    return series
+
+
+async def run_clients(clients: int, window: float) -> dict:
+    import httpx
+
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    stale_reads = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://replica.test") as client:
+
+        async def run_client(i: int) -> None:
+            nonlocal stale_reads
+            response = await client.post(
+                "/auth/register",
+                json={"email": f"replica{i}@example.com", "name": f"Replica {i}", "password": PASSWORD},
+            )
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Recién registrado: la réplica aún no lo tiene, debe leerse del primario
+            me = await client.get("/auth/me", headers=headers)
+            if me.status_code == 401:
+                stale_reads += 1
+                return
+            me.raise_for_status()
+
+            renamed = f"Renamed {i}"
+            (await client.patch(f"/users/{me.json()['id']}", json={"name": renamed}, headers=headers)).raise_for_status()
+            if (await client.get("/auth/me", headers=headers)).json()["name"] != renamed:
+                stale_reads += 1
+
+            # Pasada la ventana, las lecturas van a la réplica
+            await asyncio.sleep(window + 0.2)
+            for _ in range(5):
+                (await client.get("/users/", params={"limit": 20}, headers=headers)).raise_for_status()
+                (await client.get(f"/users/{me.json()['id']}", headers=headers)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client(i) for i in range(clients)))
+        elapsed = time.perf_counter() - start
+        metrics = (await client.get("/metrics")).text
+
+    return {
+        "clients": clients,
+        "elapsed_s": round(elapsed, 3),
+        "stale_reads_after_own_write": stale_reads,
+        "db_queries_total": parse_metrics(metrics, "db_queries_total"),
+        "db_session_routing_total": parse_metrics(metrics, "db_session_routing_total"),
+    }
+
+
+async def main(clients: int, window: float) -> dict:
+    try:
+        return await run_clients(clients, window)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--lag", type=float, default=0.5, help="Segundos entre copias del primario a la réplica")
+    parser.add_argument("--window", type=float, default=1.0, help="READ_YOUR_WRITES_SECONDS")
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--database-url", help="PostgreSQL primario (en lugar de SQLite)")
+    parser.add_argument("--replica-url", help="PostgreSQL réplica del primario")
+    args = parser.parse_args()
+    if bool(args.database_url) != bool(args.replica_url):
+        parser.error("--database-url y --replica-url se usan juntos")
+
+    directory = tempfile.mkdtemp(prefix="pool_banorte_replica_")
+    primary_path = os.path.join(directory, "primary.db")
+    replica_path = os.path.join(directory, "replica.db")
+    configure_environment(
+        primary_path,
+        BCRYPT_ROUNDS="4",
+        DB_POOL_PROFILE="test",
+        RATE_LIMIT_ENABLED="false",
+        READ_YOUR_WRITES_SECONDS=str(args.window),
+        DATABASE_REPLICA_URL=args.replica_url or f"sqlite:///{replica_path}",
+    )
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    create_schema()
+    seed_users(args.seed_users)
+
+    replicator = None
+    if not args.replica_url:
+        replicator = SQLiteReplicator(primary_path, replica_path, args.lag)
+        replicator.copy()
+        replicator.start()
+    try:
+        report = asyncio.run(main(args.clients, args.window))
+    finally:
+        if replicator is not None:
+            replicator.stop()
+    report["replica_copies"] = replicator.copies if replicator else None
+    print(json.dumps(report, indent=2))
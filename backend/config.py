@@ -11,6 +11,11 @@ class Settings:
     
     # Configuración de la base de datos
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Réplica de lectura (opcional): las requests GET/HEAD se atienden desde ella
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL")
+    # Tras una escritura, las lecturas del mismo token van al primario durante esta ventana
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    READ_YOUR_WRITES_MAX_KEYS: int = int(os.getenv("READ_YOUR_WRITES_MAX_KEYS", "100000"))
     
     # Configuración de la aplicación
     APP_NAME: str = "Pool Banorte API"
@@ -22,6 +27,65 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Configuración del pool de hashing bcrypt
+    HASH_EXECUTOR: str = os.getenv("HASH_EXECUTOR", "thread").lower()  # "thread" o "process"
+    HASH_POOL_SIZE: int = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 1)))
+    HASH_QUEUE_SIZE: int = int(os.getenv("HASH_QUEUE_SIZE", "64"))  # Tareas en espera antes de responder 503
+    
+    # Caché de usuarios autenticados (get_current_user)
+    PRINCIPAL_CACHE_ENABLED: bool = os.getenv("PRINCIPAL_CACHE_ENABLED", "True").lower() == "true"
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+    
+    # Importación masiva de usuarios
+    USER_IMPORT_MAX_ROWS: int = int(os.getenv("USER_IMPORT_MAX_ROWS", "10000"))
+    USER_IMPORT_BATCH_SIZE: int = int(os.getenv("USER_IMPORT_BATCH_SIZE", "1000"))
+    # Emails autorizados a importar (separados por coma); vacío: importación deshabilitada
+    USER_IMPORT_OPERATORS: list = [
+        email.strip().lower() for email in os.getenv("USER_IMPORT_OPERATORS", "").split(",") if email.strip()
+    ]
+    
+    # Lectura de usuarios en lote (POST /users/batch)
+    USER_BATCH_MAX_IDS: int = int(os.getenv("USER_BATCH_MAX_IDS", "100"))
+    
+    # Búsqueda de usuarios (GET /users/search)
+    USER_SEARCH_MAX_LIMIT: int = int(os.getenv("USER_SEARCH_MAX_LIMIT", "50"))
+    # Índice de prefijos en memoria (solo SQLite): se reconstruye al vencer el TTL
+    USER_SEARCH_INDEX_TTL_SECONDS: float = float(os.getenv("USER_SEARCH_INDEX_TTL_SECONDS", "300"))
+    
+    # Idempotency-Key en POST /auth/register y POST /users/
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "True").lower() == "true"
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))  # Respuestas guardadas
+    IDEMPOTENCY_MAX_KEYS: int = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))  # Claves en memoria (LRU)
+    # Espera máxima de un duplicado concurrente antes de responder 409
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    
+    # Bitácora de auditoría (logins y cambios de usuarios), escrita en lotes
+    AUDIT_LOG_ENABLED: bool = os.getenv("AUDIT_LOG_ENABLED", "True").lower() == "true"
+    AUDIT_LOG_BATCH_SIZE: int = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "500"))  # Eventos por escritura
+    AUDIT_LOG_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL_SECONDS", "1"))
+    AUDIT_LOG_MAX_QUEUE: int = int(os.getenv("AUDIT_LOG_MAX_QUEUE", "10000"))  # Eventos pendientes antes de descartar
+    
+    # Sondeo de salud de la base de datos (/health)
+    HEALTH_PROBE_INTERVAL_SECONDS: float = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "15"))
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+    
+    # Rate limiting de login, registro e importación (token bucket por IP y por email, por ruta)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_PER_IP: str = os.getenv("RATE_LIMIT_PER_IP", "30/minute")
+    RATE_LIMIT_PER_EMAIL: str = os.getenv("RATE_LIMIT_PER_EMAIL", "5/minute")
+    # POST /users/import hashea hasta USER_IMPORT_MAX_ROWS contraseñas por request
+    RATE_LIMIT_IMPORT_PER_USER: str = os.getenv("RATE_LIMIT_IMPORT_PER_USER", "5/hour")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # Buckets en memoria (LRU)
+    # Detrás de un proxy confiable (Vercel) la IP del cliente viene en X-Forwarded-For
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = os.getenv(
+        "RATE_LIMIT_TRUST_FORWARDED_FOR", "True" if os.getenv("VERCEL") else "False"
+    ).lower() == "true"
+    
+    # Métricas Prometheus (/metrics) y header Server-Timing
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_SERVER_TIMING: bool = os.getenv("METRICS_SERVER_TIMING", "False").lower() == "true"
+    
     # Configuración de CORS
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
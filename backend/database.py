@@ -1,80 +1,496 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import ArgumentError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+import asyncio
 import os
+import threading
 import traceback
-from dotenv import load_dotenv
+import uuid
+from contextlib import AsyncExitStack
 
-# Cargar variables de entorno
-load_dotenv()
+# config carga el archivo .env (una sola vez para toda la aplicación)
+import config  # noqa: F401
+
+from utils.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    get_pool_stats as _get_pool_stats,
+    instrument_engine,
+)
+from utils.metrics import instrument_sql
+from utils.read_your_writes import DB_SESSION_ROUTING, read_your_writes
 
 # Configuración de la base de datos
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pool_banorte.db")
 
-print(f"[DEBUG] DATABASE_URL configurada: {DATABASE_URL[:50]}...")  # Solo primeros 50 caracteres por seguridad
+# Logs SQL en SQLite (activos por defecto, desactivar para benchmarks)
+SQL_ECHO = os.getenv("SQL_ECHO", "true").lower() == "true"
+
+# Perfiles de pool de conexiones, seleccionados con DB_POOL_PROFILE:
+# - serverless: sin conexiones persistentes (Vercel, cada invocación conecta de nuevo)
+# - long-running: pool real con pre-ping, reciclado y warm-up (uvicorn/gunicorn en hosts persistentes)
+# - test: sin pool, conexiones deterministas por sesión
+POOL_PROFILES = {
+    "serverless": {
+        "pooled": False,
+        "pool_pre_ping": False,
+        "warmup_connections": 0,
+    },
+    "long-running": {
+        "pooled": True,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),  # Segundos
+        "pool_timeout": 30,
+        "warmup_connections": int(os.getenv("DB_POOL_WARMUP", "2")),
+    },
+    "test": {
+        "pooled": False,
+        "pool_pre_ping": False,
+        "warmup_connections": 0,
+    },
+}
+
+def get_pool_profile_name() -> str:
+    """Perfil de pool configurado (por defecto serverless en Vercel, long-running fuera)"""
+    default = "serverless" if os.getenv("VERCEL") else "long-running"
+    name = os.getenv("DB_POOL_PROFILE", default).lower()
+    if name not in POOL_PROFILES:
+        raise ValueError(f"DB_POOL_PROFILE inválido: {name} (opciones: {', '.join(POOL_PROFILES)})")
+    return name
 
-# Configuración específica para serverless (Vercel)
-if "postgresql" in DATABASE_URL or "postgres" in DATABASE_URL:
-    print("[DEBUG] Configurando engine para PostgreSQL/Supabase")
+DB_POOL_PROFILE = get_pool_profile_name()
+
+def get_pool_options(profile_name: str, url: str, is_async: bool = False) -> dict:
+    """
+    Traduce un perfil de pool a argumentos de create_engine / create_async_engine
     
-    # Configuración específica para Vercel serverless + Supabase
-    engine = create_engine(
-        DATABASE_URL,
-        # Pool configuration para serverless
-        pool_size=0,  # No mantener conexiones persistentes
-        max_overflow=0,  # Sin overflow
-        pool_pre_ping=False,  # Desactivar pre-ping en serverless
-        pool_recycle=-1,  # No reciclar conexiones
-        pool_timeout=30,  # Timeout más largo
-        echo=False,  # Sin logs SQL
-        # Configuración de conexión optimizada para Supabase
-        connect_args={
-            "connect_timeout": 30,  # Timeout más largo
-            "application_name": "pool_banorte_vercel",
-            "sslmode": "require",  # SSL obligatorio
-            "sslcert": None,
-            "sslkey": None,
-            "sslrootcert": None,
-            "options": "-c timezone=UTC -c statement_timeout=30000",
-            # Forzar IPv4 para evitar problemas de IPv6 en Vercel
-            "host": DATABASE_URL.split("@")[1].split(":")[0] if "@" in DATABASE_URL else None,
+    Args:
+        profile_name (str): Nombre del perfil (ver POOL_PROFILES)
+        url (str): URL de conexión del engine
+        is_async (bool): Si el engine es asíncrono
+        
+    Returns:
+        dict: Argumentos de pool para el engine
+    """
+    if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+        # SQLite en memoria necesita el pool por defecto (una única conexión)
+        return {}
+    profile = POOL_PROFILES[profile_name]
+    if not profile["pooled"]:
+        return {"poolclass": InstrumentedNullPool, "pool_pre_ping": profile["pool_pre_ping"]}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": profile["pool_size"],
+        "max_overflow": profile["max_overflow"],
+        "pool_pre_ping": profile["pool_pre_ping"],
+        "pool_recycle": profile["pool_recycle"],
+        "pool_timeout": profile["pool_timeout"],
+    }
+
+# Modo de sentencias en PostgreSQL, seleccionado con DB_STATEMENT_MODE:
+# - pooler: detrás del Transaction Pooler de Supabase (puerto 6543) cada transacción
+#   puede usar otra conexión física, así que no hay prepared statements del servidor;
+#   solo la caché de SQL compilado de SQLAlchemy (sentencias de services/user_queries.py)
+# - prepared: conexión directa (puerto 5432); asyncpg prepara cada sentencia en el
+#   servidor una vez por conexión y la reutiliza (se ahorra el parse/plan)
+# Por defecto se deduce de la URL: pooler en el puerto 6543, prepared en otro caso
+STATEMENT_MODES = ("pooler", "prepared")
+
+# Entradas de la caché de SQL compilado por engine (query_cache_size de SQLAlchemy)
+DB_COMPILED_CACHE_SIZE = int(os.getenv("DB_COMPILED_CACHE_SIZE", "500"))
+# Prepared statements guardados por conexión en modo prepared
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+
+def get_statement_mode(url: str) -> str:
+    """
+    Modo de sentencias para una URL de PostgreSQL (ver STATEMENT_MODES)
+
+    Args:
+        url (str): URL de conexión del engine
+
+    Returns:
+        str: DB_STATEMENT_MODE si está definido; si no, pooler para el puerto 6543
+    """
+    name = os.getenv("DB_STATEMENT_MODE")
+    if name is None:
+        try:
+            port = make_url(url).port
+        except ArgumentError:
+            port = None
+        return "pooler" if port == 6543 else "prepared"
+    name = name.lower()
+    if name not in STATEMENT_MODES:
+        raise ValueError(f"DB_STATEMENT_MODE inválido: {name} (opciones: {', '.join(STATEMENT_MODES)})")
+    return name
+
+def get_asyncpg_statement_args(mode: str) -> dict:
+    """
+    connect_args de asyncpg para un modo de sentencias
+
+    Args:
+        mode (str): pooler o prepared
+
+    Returns:
+        dict: Tamaños de las cachés de prepared statements (y nombres únicos en pooler)
+    """
+    if mode == "prepared":
+        return {
+            "statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
         }
-    )
-    print("[DEBUG] Engine PostgreSQL configurado exitosamente")
-else:
-    print("[DEBUG] Configurando engine para SQLite")
-    # Configuración para SQLite (desarrollo local)
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        echo=True  # Activar logs SQL en desarrollo
-    )
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        # asyncpg igual prepara cada sentencia (sin reutilizarla); con nombres únicos
+        # no choca con una del mismo nombre que otro cliente dejó en la conexión del pooler
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+# Los engines se crean de forma perezosa (primer uso o lifespan) para no pagar
+# su costo en el arranque en frío de Vercel, donde cada invocación importa main
+_engine = None
+_session_factory = None
+_async_engine = None
+_async_session_factory = None
+_async_replica_engine = None
+_async_replica_session_factory = None
+_engines_lock = threading.Lock()
+
+def _create_engine():
+    print(f"[DEBUG] DATABASE_URL configurada: {DATABASE_URL[:50]}...")  # Solo primeros 50 caracteres por seguridad
+    print(f"[DEBUG] Perfil de pool de conexiones: {DB_POOL_PROFILE}")
+    if "postgresql" in DATABASE_URL or "postgres" in DATABASE_URL:
+        print("[DEBUG] Configurando engine para PostgreSQL/Supabase")
+    
+        engine = create_engine(
+            DATABASE_URL,
+            **get_pool_options(DB_POOL_PROFILE, DATABASE_URL),
+            echo=False,  # Sin logs SQL
+            query_cache_size=DB_COMPILED_CACHE_SIZE,
+            # Configuración de conexión optimizada para Supabase
+            connect_args={
+                "connect_timeout": 30,  # Timeout más largo
+                "application_name": "pool_banorte_vercel",
+                "sslmode": "require",  # SSL obligatorio
+                "sslcert": None,
+                "sslkey": None,
+                "sslrootcert": None,
+                "options": "-c timezone=UTC -c statement_timeout=30000",
+                # Forzar IPv4 para evitar problemas de IPv6 en Vercel
+                "host": DATABASE_URL.split("@")[1].split(":")[0] if "@" in DATABASE_URL else None,
+            }
+        )
+        print("[DEBUG] Engine PostgreSQL configurado exitosamente")
+    else:
+        print("[DEBUG] Configurando engine para SQLite")
+        # Configuración para SQLite (desarrollo local)
+        engine = create_engine(
+            DATABASE_URL,
+            **get_pool_options(DB_POOL_PROFILE, DATABASE_URL),
+            connect_args={"check_same_thread": False},
+            echo=SQL_ECHO,  # Activar logs SQL en desarrollo
+            query_cache_size=DB_COMPILED_CACHE_SIZE,
+        )
+    
+    # Métricas de pool (tiempo de checkout, conexiones en uso y creadas)
+    instrument_engine("sync", engine)
+    # Conteo y tiempo de consultas SQL por request (/metrics)
+    instrument_sql("sync", engine)
+    return engine
+
+def get_engine():
+    """Engine síncrono (se crea en el primer uso)"""
+    global _engine
+    if _engine is None:
+        with _engines_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
 
-# Crear SessionLocal class con configuración optimizada
-SessionLocal = sessionmaker(
-    autocommit=False, 
-    autoflush=False, 
-    bind=engine,
-    expire_on_commit=False  # Evitar problemas con objetos después del commit
+def get_session_factory():
+    """Fábrica de sesiones síncronas (SessionLocal)"""
+    global _session_factory
+    if _session_factory is None:
+        # Crear SessionLocal class con configuración optimizada
+        _session_factory = sessionmaker(
+            autocommit=False, 
+            autoflush=False, 
+            bind=get_engine(),
+            expire_on_commit=False  # Evitar problemas con objetos después del commit
+        )
+    return _session_factory
+
+def get_async_database_url(url: str) -> str:
+    """
+    Convierte la DATABASE_URL síncrona a su equivalente con driver asíncrono
+
+    Args:
+        url (str): URL de conexión síncrona (psycopg2 / pysqlite)
+
+    Returns:
+        str: URL con driver asyncpg (PostgreSQL) o aiosqlite (SQLite)
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://") and not url.startswith("sqlite+aiosqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+# URL asíncrona (se puede sobrescribir explícitamente con ASYNC_DATABASE_URL)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+
+# Réplica de lectura opcional (p. ej. la réplica de Supabase o un segundo archivo SQLite local)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL") or (
+    get_async_database_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
 )
 
+def _create_async_engine(url: str = None, name: str = "async"):
+    """
+    Crea un engine asíncrono instrumentado
+    
+    Args:
+        url (str, optional): URL asíncrona (por defecto ASYNC_DATABASE_URL)
+        name (str): Nombre del engine en las métricas (async, async_replica)
+    """
+    url = url or ASYNC_DATABASE_URL
+    if url.startswith("postgresql+asyncpg"):
+        statement_mode = get_statement_mode(url)
+        print(f"[DEBUG] Configurando engine {name} para PostgreSQL/Supabase (asyncpg, sentencias: {statement_mode})")
+        async_engine = create_async_engine(
+            url,
+            **get_pool_options(DB_POOL_PROFILE, url, is_async=True),
+            echo=False,
+            query_cache_size=DB_COMPILED_CACHE_SIZE,
+            connect_args={
+                "timeout": 30,
+                "ssl": "require",
+                **get_asyncpg_statement_args(statement_mode),
+                "server_settings": {
+                    "application_name": "pool_banorte_vercel",
+                    "timezone": "UTC",
+                    "statement_timeout": "30000",
+                },
+            }
+        )
+    else:
+        print(f"[DEBUG] Configurando engine {name} para SQLite (aiosqlite)")
+        async_engine = create_async_engine(
+            url,
+            **get_pool_options(DB_POOL_PROFILE, url, is_async=True),
+            echo=SQL_ECHO,
+            query_cache_size=DB_COMPILED_CACHE_SIZE,
+        )
+    
+    instrument_engine(name, async_engine.sync_engine)
+    instrument_sql(name, async_engine.sync_engine)
+    return async_engine
+
+def get_async_engine():
+    """Engine asíncrono usado por los routers (se crea en el primer uso)"""
+    global _async_engine
+    if _async_engine is None:
+        with _engines_lock:
+            if _async_engine is None:
+                _async_engine = _create_async_engine()
+    return _async_engine
+
+def get_async_replica_engine():
+    """Engine asíncrono de la réplica de lectura, o None si no está configurada"""
+    global _async_replica_engine
+    if ASYNC_DATABASE_REPLICA_URL is None:
+        return None
+    if _async_replica_engine is None:
+        with _engines_lock:
+            if _async_replica_engine is None:
+                _async_replica_engine = _create_async_engine(ASYNC_DATABASE_REPLICA_URL, name="async_replica")
+    return _async_replica_engine
+
+def _async_sessionmaker(bind):
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False  # Los objetos se siguen leyendo después del commit sin I/O implícito
+    )
+
+def get_async_session_factory(replica: bool = False):
+    """
+    Fábrica de sesiones asíncronas (AsyncSessionLocal)
+    
+    Args:
+        replica (bool): Sesiones contra la réplica de lectura (si no hay
+            réplica configurada se usa el primario)
+    """
+    global _async_session_factory, _async_replica_session_factory
+    if replica and ASYNC_DATABASE_REPLICA_URL is not None:
+        if _async_replica_session_factory is None:
+            _async_replica_session_factory = _async_sessionmaker(get_async_replica_engine())
+        return _async_replica_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = _async_sessionmaker(get_async_engine())
+    return _async_session_factory
+
+# Compatibilidad: `database.engine`, `database.SessionLocal`, etc. siguen
+# disponibles como atributos del módulo, creados en el primer acceso
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_session_factory,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def dispose_engines() -> None:
+    """Cierra las conexiones de los engines que ya fueron creados"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _async_replica_engine is not None:
+        await _async_replica_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+def reset_engines_after_fork() -> None:
+    """
+    Descarta los pools heredados del proceso padre (post_fork de server.py)
+
+    dispose(close=False) reemplaza el pool por uno vacío sin cerrar las
+    conexiones heredadas: sus sockets siguen siendo del padre y cerrarlos
+    desde el hijo rompería las del padre. Cada worker abre las suyas.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+    for async_engine in (_async_engine, _async_replica_engine):
+        if async_engine is not None:
+            async_engine.sync_engine.dispose(close=False)
+
 # Crear Base class
 Base = declarative_base()
 
 # Dependency para obtener la sesión de la base de datos
+# (síncrona: se mantiene para scripts, migraciones y tests)
 def get_db():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
+# Métodos que no modifican datos (se pueden atender desde la réplica)
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+def _route_session(request: Request):
+    """Decide si la sesión de la request usa la réplica y por qué"""
+    if request.method not in SAFE_METHODS:
+        return False, "write"
+    if ASYNC_DATABASE_REPLICA_URL is None:
+        return False, "no_replica"
+    if read_your_writes.is_active(read_your_writes.key_for(request)):
+        return False, "read_your_writes"
+    return True, "read"
+
+# Dependency para obtener una sesión asíncrona (usada por los routers)
+async def get_async_db(request: Request):
+    """
+    Sesión asíncrona ruteada: GET/HEAD a la réplica, el resto al primario
+    
+    Las escrituras abren una ventana de read-your-writes para el token del
+    cliente (al empezar y al terminar la request): mientras dure, sus
+    lecturas siguen en el primario aunque la réplica esté atrasada.
+    """
+    use_replica, reason = _route_session(request)
+    DB_SESSION_ROUTING.inc(("replica" if use_replica else "primary", reason))
+    
+    write_key = read_your_writes.key_for(request) if reason == "write" else None
+    read_your_writes.mark(write_key)
+    try:
+        async with get_async_session_factory(replica=use_replica)() as db:
+            yield db
+    finally:
+        # Extender la ventana desde el final de la escritura
+        read_your_writes.mark(write_key)
+
+def dialect_insert(db, table):
+    """
+    INSERT específico del dialecto de la sesión (soporta ON CONFLICT)
+    
+    Args:
+        db: Sesión síncrona o asíncrona
+        table: Modelo o tabla destino
+        
+    Raises:
+        NotImplementedError: Si el dialecto no es PostgreSQL ni SQLite
+    """
+    # Importaciones diferidas: solo se carga el dialecto en uso
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table)
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table)
+    raise NotImplementedError(f"Dialecto no soportado: {db.bind.dialect.name}")
+
+async def warm_up_pool(connections: int = None) -> int:
+    """
+    Abre conexiones del pool asíncrono por adelantado (perfil long-running)
+    
+    Args:
+        connections (int, optional): Conexiones a abrir (por defecto las del perfil)
+        
+    Returns:
+        int: Número de conexiones abiertas exitosamente
+    """
+    if connections is None:
+        connections = POOL_PROFILES[DB_POOL_PROFILE]["warmup_connections"]
+    if connections <= 0:
+        return 0
+    
+    async def open_connection(conn_stack):
+        conn = await conn_stack.enter_async_context(get_async_engine().connect())
+        await conn.execute(text("SELECT 1"))
+    
+    async with AsyncExitStack() as stack:
+        # Mantener todas abiertas a la vez para que el pool cree `connections` distintas
+        results = await asyncio.gather(
+            *(open_connection(stack) for _ in range(connections)),
+            return_exceptions=True
+        )
+    opened = sum(1 for result in results if not isinstance(result, Exception))
+    print(f"[DEBUG] Warm-up del pool: {opened}/{connections} conexiones")
+    return opened
+
+def get_pool_stats() -> dict:
+    """Estado y métricas de los pools de conexiones (solo engines ya creados)"""
+    engines = {}
+    if _engine is not None:
+        engines["sync"] = _engine
+    if _async_engine is not None:
+        engines["async"] = _async_engine.sync_engine
+    if _async_replica_engine is not None:
+        engines["async_replica"] = _async_replica_engine.sync_engine
+    return {
+        "profile": DB_POOL_PROFILE,
+        "engines": _get_pool_stats(engines),
+    }
+
 # Función para verificar la conexión a la base de datos
 def check_database_connection():
     """Función para verificar si la conexión a la base de datos está funcionando"""
     try:
         print("[DEBUG] Intentando conectar a la base de datos...")
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             print("[DEBUG] Conexión establecida, ejecutando SELECT 1...")
             result = connection.execute(text("SELECT 1"))
             print("[DEBUG] Query ejecutada exitosamente")
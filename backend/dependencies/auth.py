@@ -7,10 +7,12 @@ que requieren autenticación JWT.
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from services.user_services import UserService
+from config import settings
+from database import get_async_db
+from services.principal_cache import principal_cache
+from services.user_services import AsyncUserService
 from utils.auth import verify_token
 from models import User
 
@@ -19,18 +21,18 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Dependencia para obtener el usuario actual desde el token JWT
     
     Esta función se usa como dependencia en endpoints protegidos.
     Extrae el token del header Authorization, lo verifica y retorna
-    el usuario correspondiente.
+    el usuario correspondiente (desde la caché de principals si está disponible).
     
     Args:
         token: Token JWT extraído del header Authorization
-        db: Sesión de base de datos
+        db: Sesión asíncrona de base de datos
         
     Returns:
         User: Usuario autenticado
@@ -52,11 +54,39 @@ async def get_current_user(
     except Exception:
         raise credentials_exception
     
-    user = UserService.get_user_by_email(db, email=email)
+    # Evitar el round trip a la base de datos si el principal ya está cacheado
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+    
+    user = await AsyncUserService.get_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
+    principal_cache.set(email, user)
     return user
 
+async def get_import_operator(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Dependencia para endpoints de operadores (importación masiva de usuarios)
+    
+    Args:
+        current_user: Usuario actual obtenido de get_current_user
+        
+    Returns:
+        User: Usuario autenticado cuyo email está en USER_IMPORT_OPERATORS
+        
+    Raises:
+        HTTPException: 403 si el usuario no es operador (o la lista está vacía)
+    """
+    if current_user.email.lower() not in settings.USER_IMPORT_OPERATORS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para importar usuarios"
+        )
+    return current_user
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -0,0 +1,39 @@
+"""
+Job de reconciliación de los contadores de pools contra el ledger
+
+Compara `pools.current_amount` y `pools.contributor_count` con los totales
+calculados desde `transactions` y reporta los desvíos como JSON. Con --fix
+recalcula los contadores (y los aportes de los participantes) de los pools
+con desvío. Pensado para ejecutarse periódicamente (cron) o después de un
+incidente; retorna código 1 si encontró desvíos sin corregirlos.
+
+Uso (desde backend/):
+    python -m jobs.reconcile_pool_counters
+    python -m jobs.reconcile_pool_counters --pool-id 12 --pool-id 15 --fix
+"""
+
+import argparse
+import asyncio
+import sys
+
+from database import dispose_engines, get_async_session_factory
+from services.pool_services import PoolService
+
+
+async def main(pool_ids, fix: bool) -> int:
+    try:
+        async with get_async_session_factory()() as db:
+            result = await PoolService.reconcile_counters(db, pool_ids=pool_ids, fix=fix)
+    finally:
+        await dispose_engines()
+
+    print(result.model_dump_json(indent=2))
+    return 1 if result.drifted and not fix else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-id", type=int, action="append", dest="pool_ids", help="Revisar solo este pool (repetible)")
+    parser.add_argument("--fix", action="store_true", help="Corregir los contadores con desvío")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.pool_ids, args.fix)))
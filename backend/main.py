@@ -1,16 +1,43 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import os
 import traceback
-from database import get_db, check_database_connection, check_database_connection_direct
+from database import get_db, check_database_connection, check_database_connection_direct, dispose_engines, get_pool_stats, warm_up_pool
+from services.audit_log import audit_logger
+from services.health_services import health_prober
+from config import settings
+from utils.hashing import hashing_executor
+from utils.metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
 
 from routers.users import router as users_router
 from routers.auth import router as auth_router
+from routers.pools import router as pools_router
 
 
-app = FastAPI(title="Pool Banorte API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialización y limpieza de recursos del proceso"""
+    # Abrir conexiones por adelantado (solo en el perfil long-running)
+    await warm_up_pool()
+    # Sondeo periódico de la base de datos para /health
+    health_prober.start()
+    # Escritura en lotes de la bitácora de auditoría
+    audit_logger.start()
+    yield
+    # Escribir los eventos de auditoría pendientes, cerrar las conexiones de
+    # los pools y liberar los workers de bcrypt
+    await audit_logger.stop()
+    await health_prober.stop()
+    await dispose_engines()
+    hashing_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="Pool Banorte API", version="1.0.0", lifespan=lifespan)
 
 # Configuración de CORS
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -23,8 +50,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métricas por ruta (latencia, requests en vuelo, SQL y bcrypt por request);
+# se agrega al final para quedar como middleware más externo
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
 app.include_router(users_router)
 app.include_router(auth_router)
+app.include_router(pools_router)
 
 
 
@@ -33,8 +66,29 @@ def read_root():
     return {"message": "Pool Banorte API está funcionando"}
 
 @app.get("/health")
-def health_check():
-    """Endpoint para verificar el estado de la API y la base de datos"""
+async def health_check(deep: bool = False):
+    """
+    Endpoint para verificar el estado de la API y la base de datos
+    
+    Por defecto retorna el último resultado del sondeo en segundo plano
+    (tiempo constante, sin abrir conexiones). Con `deep=true` ejecuta en el
+    momento las pruebas de conexión con SQLAlchemy y psycopg2 (uso manual).
+    """
+    if deep:
+        return await run_in_threadpool(deep_health_check)
+    
+    probe = await health_prober.get_status()
+    db_connected = probe["healthy"]
+    return {
+        "status": "healthy" if db_connected else "unhealthy",
+        "database": "connected" if db_connected else "disconnected",
+        "message": "API funcionando correctamente" if db_connected else "Problema con la conexión a la base de datos",
+        "environment": os.getenv("ENVIRONMENT", "development"),
+        "probe": probe
+    }
+
+def deep_health_check():
+    """Prueba ambos métodos de conexión con conexiones nuevas (bloqueante)"""
     print("[DEBUG] Iniciando health check...")
     
     try:
@@ -89,6 +143,21 @@ def health_check_simple():
         "environment": os.getenv("ENVIRONMENT", "development")
     }
 
+@app.get("/health/pool")
+def pool_stats():
+    """Estado de los pools de conexiones: tiempo de checkout, conexiones en uso y creadas"""
+    return get_pool_stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas de la API en formato de texto de Prometheus"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas")
+    return PlainTextResponse(
+        render_metrics(get_pool_stats()["engines"], hashing_executor.stats()),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Endpoints de depuración eliminados - problema resuelto
 
 if __name__ == "__main__":
@@ -1,28 +1,141 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    DDL, Column, Integer, String, DateTime, Boolean, Text, Uuid, Index, Numeric, ForeignKey, UniqueConstraint, event
+)
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 from database import Base
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class BaseModel(Base):
     """Modelo base con campos comunes"""
     __abstract__ = True
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Default en Python (con microsegundos) para que created_at sea un orden estable
+    # en la paginación por cursor; server_default cubre inserts fuera del ORM
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    # También en Python: el ETag de las lecturas (utils.http_cache) se deriva de
+    # updated_at y CURRENT_TIMESTAMP de SQLite solo tiene resolución de segundos
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
 
 class User(BaseModel):
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Uuid genérico: UUID nativo en PostgreSQL, CHAR(32) en SQLite (desarrollo local)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
     password = Column(String(255), nullable=False)  # Hash bcrypt de la contraseña
     
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Búsqueda (GET /users/search): trigramas para ILIKE '%q%', solo en PostgreSQL
+        # (en SQLite se usa el índice de prefijos en memoria de services.user_search)
+        Index(
+            "ix_users_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_trgm", "email",
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# Los índices de trigramas requieren la extensión pg_trgm
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+    
 class Pool(BaseModel):
     __tablename__ = "pools"
     
     id = Column(Integer, primary_key=True, index=True)
+    # Nullable solo por los pools creados antes de tener organizador
+    organizer_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     name = Column(String(100), nullable=False)
     description = Column(Text)
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
+    status = Column(String(50), nullable=False, default="active", server_default="active")  # active, completed, cancelled
+    visibility = Column(String(50), nullable=False, default="private", server_default="private")  # private, public, link_only
+    target_amount = Column(Numeric(15, 2), nullable=False, default=0, server_default="0")
+    
+    # Contadores desnormalizados del ledger (transactions): se actualizan con
+    # incrementos en SQL dentro de la misma transacción que cada contribución
+    # o reembolso, para que leer el progreso de un pool sea O(1)
+    current_amount = Column(Numeric(15, 2), nullable=False, default=0, server_default="0")
+    contributor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # lazy="raise": el organizador se carga explícitamente (selectinload) para
+    # que un listado nunca haga una consulta por pool (N+1)
+    organizer = relationship("User", lazy="raise")
+    
+    __table_args__ = (
+        # "Mis pools activos" ordenados por fecha
+        Index("ix_pools_organizer_id_is_active_created_at", "organizer_id", "is_active", "created_at"),
+        # Exploración de pools públicos por estado
+        Index("ix_pools_visibility_status_created_at", "visibility", "status", "created_at"),
+    )
+
+class PoolParticipant(BaseModel):
+    """Aporte neto de cada usuario a un pool (determina contributor_count)"""
+    __tablename__ = "pool_participants"
+    
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    pool_id = Column(Integer, ForeignKey("pools.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    contribution_amount = Column(Numeric(15, 2), nullable=False, default=0, server_default="0")
+    last_contribution_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        UniqueConstraint("pool_id", "user_id", name="unique_pool_participant"),
+    )
+
+class Transaction(BaseModel):
+    """Ledger de movimientos de dinero de los pools (fuente de verdad de los contadores)"""
+    __tablename__ = "transactions"
+    
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    pool_id = Column(Integer, ForeignKey("pools.id", ondelete="CASCADE"), nullable=False)
+    # Un usuario con movimientos no se puede eliminar (409): el ledger no pierde
+    # filas ni queda con contribuciones sin dueño. NO ACTION y no RESTRICT: se
+    # verifica al final de la sentencia, después de borrar en cascada sus pools
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="NO ACTION"), nullable=False)
+    transaction_type = Column(String(50), nullable=False)  # contribution, refund
+    amount = Column(Numeric(15, 2), nullable=False)  # Siempre positivo
+    status = Column(String(50), nullable=False, default="completed")  # completed, refunded
+    refund_of_id = Column(Uuid(as_uuid=True), ForeignKey("transactions.id"))  # Contribución reembolsada
+    
+    __table_args__ = (
+        # Reconciliación: agregados por pool y usuario
+        Index("ix_transactions_pool_id_user_id", "pool_id", "user_id"),
+        # Verificación de la llave foránea al eliminar un usuario (sin recorrer el ledger)
+        Index("ix_transactions_user_id", "user_id"),
+    )
+
+class AuditLog(Base):
+    """
+    Bitácora de auditoría de logins y cambios de usuarios (solo inserciones)
+
+    Se escribe en lotes desde services.audit_log. user_id no es FK: los
+    eventos de un usuario se conservan después de eliminarlo.
+    """
+    __tablename__ = "audit_logs"
+    
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Momento del evento (no del INSERT, que ocurre después en el lote)
+    occurred_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    event = Column(String(50), nullable=False)  # login_succeeded, login_failed, user_updated, user_deleted
+    user_id = Column(Uuid(as_uuid=True))
+    email = Column(String(255))  # Email del intento (los logins fallidos pueden no tener usuario)
+    details = Column(Text)  # JSON (p. ej. campos modificados, nunca sus valores)
+    
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_occurred_at", "user_id", "occurred_at"),
+        Index("ix_audit_logs_occurred_at", "occurred_at"),
+    )
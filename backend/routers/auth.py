@@ -1,20 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 
-from database import get_db
+from database import get_async_db
 from schemas.user_schemas import UserCreate, UserLogin, Token, UserResponseWithToken, UserResponse
-from services.user_services import UserService
+from services.user_services import AsyncUserService
 from utils.auth import ACCESS_TOKEN_EXPIRE_MINUTES, verify_password, create_access_token
+from utils.http_cache import conditional_response
+from utils.idempotency import StoredResponse, idempotency_store
+from utils.rate_limit import rate_limiter
+from utils.read_your_writes import read_your_writes, token_digest
 from dependencies.auth import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["autenticación"])
 
+def _registration_response(user) -> UserResponseWithToken:
+    """Usuario registrado con un token de acceso recién emitido"""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.email, "user_id": str(user.id)},
+        expires_delta=access_token_expires
+    )
+    # El token es nuevo: abrir su ventana de read-your-writes para que el
+    # primer /auth/me no vaya a una réplica que aún no tiene al usuario
+    read_your_writes.mark(token_digest(access_token))
+    return UserResponseWithToken(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        access_token=access_token,
+        token_type="bearer"
+    )
+
 @router.post("/register", response_model=UserResponseWithToken, status_code=status.HTTP_201_CREATED)
 async def register_user(
+    request: Request,
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Registrar un nuevo usuario en el sistema
@@ -23,47 +49,53 @@ async def register_user(
     - **name**: Nombre completo del usuario  
     - **password**: Contraseña (mínimo 8 caracteres, debe contener letras y números)
     
-    Retorna el usuario creado junto con su token de acceso.
+    Retorna el usuario creado junto con su token de acceso. Con el header
+    `Idempotency-Key`, los reintentos reciben el mismo usuario con un token nuevo.
     """
-    # Verificar si el email ya existe
-    existing_user = UserService.get_user_by_email(db, user_data.email)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado en el sistema"
-        )
-    
-    # Crear el nuevo usuario
-    try:
-        new_user = UserService.create_user(db, user_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al crear el usuario: {str(e)}"
+    async def refresh_registration(stored: StoredResponse) -> Optional[StoredResponse]:
+        # Solo se guarda el usuario: el token original pudo haber expirado. El
+        # nuevo se firma con el id y email guardados, sin consultar la base de datos
+        if stored.status_code != status.HTTP_201_CREATED:
+            return stored
+        user = UserResponse.model_validate_json(stored.body)
+        return stored._replace(body=_registration_response(user).model_dump_json().encode())
+
+    # Reintento con Idempotency-Key: el usuario original con un token nuevo, sin consultas ni bcrypt
+    async with idempotency_store.scope(request, "register", user_data, refresh=refresh_registration) as idempotency:
+        if idempotency.replay is not None:
+            return idempotency.replay
+        
+        # Antes de cualquier consulta o hash: 429 si la IP o el email excedieron el límite
+        await rate_limiter.check(request, "register", email=user_data.email)
+        
+        # Crear el nuevo usuario (400 si el email ya existe, incluso con registros concurrentes)
+        try:
+            new_user = await AsyncUserService.register_user(db, user_data)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al crear el usuario: {str(e)}"
+            )
+        
+        # Retornar usuario con token; para los reintentos se guarda solo el usuario
+        return await idempotency.respond(
+            _registration_response(new_user),
+            status_code=status.HTTP_201_CREATED,
+            stored=UserResponse.model_validate(new_user)
         )
-    
-    # Generar token de acceso
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": new_user.email, "user_id": str(new_user.id)},
-        expires_delta=access_token_expires
-    )
-    
-    # Retornar usuario con token
-    return UserResponseWithToken(
-        id=new_user.id,
-        email=new_user.email,
-        name=new_user.name,
-        created_at=new_user.created_at,
-        updated_at=new_user.updated_at,
-        access_token=access_token,
-        token_type="bearer"
-    )
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Autenticar usuario con formulario OAuth2 (para compatibilidad con Swagger UI)
@@ -73,7 +105,9 @@ async def login_for_access_token(
     
     Retorna un token de acceso JWT.
     """
-    user = UserService.authenticate_user(db, form_data.username, form_data.password)
+    await rate_limiter.check(request, "login", email=form_data.username)
+    
+    user = await AsyncUserService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -91,8 +125,9 @@ async def login_for_access_token(
 
 @router.post("/login-json", response_model=Token)
 async def login_json(
+    request: Request,
     user_credentials: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Autenticar usuario con JSON
@@ -102,7 +137,10 @@ async def login_json(
     
     Retorna un token de acceso JWT.
     """
-    user = UserService.authenticate_user(db, user_credentials.email, user_credentials.password)
+    # /login y /login-json comparten buckets: alternar entre ambos no evade el límite
+    await rate_limiter.check(request, "login", email=user_credentials.email)
+    
+    user = await AsyncUserService.authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -119,10 +157,14 @@ async def login_json(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user = Depends(get_current_user)):
+async def read_users_me(request: Request, response: Response, current_user = Depends(get_current_user)):
     """
     Obtener información del usuario autenticado actual
     
-    Requiere token de autenticación válido.
+    Requiere token de autenticación válido. Soporta GET condicional: con
+    `If-None-Match: <ETag>` responde 304 sin cuerpo si el perfil no cambió.
     """
+    not_modified = conditional_response(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
     return current_user
\ No newline at end of file
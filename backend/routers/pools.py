@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from database import get_async_db
+from schemas.pool_schemas import (
+    ContributionCreate, PoolCreate, PoolPage, PoolResponse, PoolStatus, PoolVisibility, TransactionResponse
+)
+from services.pool_services import PoolService
+from dependencies.auth import get_current_user
+from models import User
+from utils.pagination import InvalidCursorError
+
+router = APIRouter(prefix="/pools", tags=["pools"])
+
+@router.post("/", response_model=PoolResponse, status_code=status.HTTP_201_CREATED)
+async def create_pool(
+    pool_data: PoolCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Crear un nuevo pool (colecta)"""
+    return await PoolService.create_pool(db, pool_data, organizer_id=current_user.id)
+
+@router.get("/", response_model=PoolPage)
+async def list_pools(
+    mine: bool = Query(False, description="Solo los pools organizados por el usuario actual"),
+    is_active: Optional[bool] = None,
+    status_filter: Optional[PoolStatus] = Query(None, alias="status"),
+    visibility: Optional[PoolVisibility] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la página anterior"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Listar pools con su progreso y organizador, del más reciente al más antiguo
+
+    - **mine=true**: pools del usuario actual (cualquier visibilidad)
+    - **mine=false** (por defecto): solo pools públicos
+    - Para la siguiente página enviar `cursor=<next_cursor>`
+    """
+    if not mine:
+        if visibility not in (None, "public"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Solo se pueden listar pools públicos de otros usuarios"
+            )
+        visibility = "public"
+    
+    try:
+        pools, next_cursor = await PoolService.list_pools(
+            db,
+            organizer_id=current_user.id if mine else None,
+            is_active=is_active,
+            status=status_filter,
+            visibility=visibility,
+            limit=limit,
+            cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return PoolPage(items=pools, next_cursor=next_cursor)
+
+@router.get("/{pool_id}", response_model=PoolResponse)
+async def get_pool(
+    pool_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Obtener un pool con su progreso (monto actual vs. objetivo y número de contribuyentes)
+
+    Un pool privado solo lo ve su organizador; para los demás responde 404.
+    """
+    pool = await PoolService.get_pool(db, pool_id, user_id=current_user.id)
+    if not pool:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pool no encontrado"
+        )
+    return pool
+
+@router.post("/{pool_id}/contribute", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+async def contribute(
+    pool_id: int,
+    contribution: ContributionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Registrar una contribución del usuario actual al pool (404 si es privado de otro organizador)"""
+    transaction = await PoolService.contribute(db, pool_id, current_user.id, contribution.amount)
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pool no encontrado o inactivo"
+        )
+    return transaction
+
+@router.post("/transactions/{transaction_id}/refund", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+async def refund_contribution(
+    transaction_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Reembolsar una contribución propia (solo el contribuyente puede reembolsarla)"""
+    refund = await PoolService.refund(db, transaction_id, current_user.id)
+    if not refund:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contribución no encontrada o ya reembolsada"
+        )
+    return refund
@@ -1,60 +1,226 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
 from uuid import UUID
 
-from database import get_db
-from schemas.user_schemas import UserCreate, UserUpdate, UserResponse
-from services.user_services import UserService
-from dependencies.auth import get_current_user
+from config import settings
+from database import get_async_db, get_async_session_factory
+from schemas.user_schemas import (
+    UserCreate, UserUpdate, UserResponse, UserPage, UserImportResult, UserSearchResult,
+    UserBatchRequest, UserBatchResponse
+)
+from services.user_services import AsyncUserService, UserHasTransactionsError
+from dependencies.auth import get_current_user, get_import_operator
 from models import User
+from utils.bulk_import import ImportFormatError, detect_format, parse_rows
+from utils.export import csv_chunk, csv_header, ndjson_chunk
+from utils.http_cache import conditional_response
+from utils.idempotency import idempotency_store
+from utils.pagination import InvalidCursorError
+from utils.rate_limit import rate_limiter
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserResponse])
-def get_users(
+@router.get("/", response_model=Union[UserPage, List[UserResponse]])
+async def get_users(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la página anterior (modo cursor)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Listar usuarios con paginación (requiere autenticación)"""
-    users = UserService.get_users(db, skip=skip, limit=limit)
+    """
+    Listar usuarios con paginación (requiere autenticación)
+    
+    - **pagination=offset** (por defecto): `skip`/`limit`, retorna una lista
+    - **pagination=cursor** (o enviando `cursor`): retorna `items` y `next_cursor`;
+      para la siguiente página enviar `cursor=<next_cursor>`
+    """
+    if pagination == "cursor" or cursor is not None:
+        try:
+            users, next_cursor = await AsyncUserService.get_users_page(db, limit=limit, cursor=cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        return UserPage(items=users, next_cursor=next_cursor)
+    
+    users = await AsyncUserService.get_users(db, skip=skip, limit=limit)
     return users
 
+@router.get("/search", response_model=List[UserSearchResult])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100, description="Nombre o email (o su comienzo)"),
+    limit: int = Query(10, ge=1, le=settings.USER_SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Buscar usuarios por nombre o email, p. ej. para invitarlos a un pool (requiere autenticación)
+    
+    Los resultados se ordenan por relevancia: coincidencia exacta, comienzo
+    del email, comienzo del nombre y el resto.
+    """
+    query = q.strip()
+    if not query:
+        return []
+    return await AsyncUserService.search_users(db, query, limit=limit)
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exportar todos los usuarios en streaming (requiere autenticación)
+    
+    - **format=ndjson** (por defecto): un objeto JSON por línea
+    - **format=csv**: CSV con encabezado
+    
+    La respuesta se genera lote a lote desde un cursor del servidor, por lo que
+    la memoria usada es constante sin importar el número de usuarios.
+    """
+    fields = AsyncUserService.EXPORT_FIELDS
+    
+    async def generate():
+        # Sesión propia: debe vivir mientras se transmite la respuesta
+        # (lectura masiva: desde la réplica si está configurada)
+        async with get_async_session_factory(replica=True)() as db:
+            if format == "csv":
+                yield csv_header(fields)
+            async for rows in AsyncUserService.stream_users(db):
+                yield csv_chunk(rows) if format == "csv" else ndjson_chunk(fields, rows)
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: UUID, 
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtener usuario por ID (requiere autenticación)"""
-    user = UserService.get_user_by_id(db, user_id)
+    """
+    Obtener usuario por ID (requiere autenticación)
+    
+    Soporta GET condicional con `If-None-Match` / `If-Modified-Since` (304 sin cuerpo).
+    """
+    user = await AsyncUserService.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
+    not_modified = conditional_response(request, response, user)
+    if not_modified is not None:
+        return not_modified
     return user
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Crear nuevo usuario"""
-    # Verificar si el email ya existe
-    existing_user = UserService.get_user_by_email(db, user_data.email)
-    if existing_user:
+async def create_user(request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Crear nuevo usuario (los reintentos con el mismo Idempotency-Key reciben la misma respuesta)"""
+    async with idempotency_store.scope(request, "create_user", user_data) as idempotency:
+        if idempotency.replay is not None:
+            return idempotency.replay
+        
+        # Mismo límite que /auth/register: también ejecuta bcrypt sin autenticación
+        await rate_limiter.check(request, "register", email=user_data.email)
+        
+        try:
+            user = await AsyncUserService.register_user(db, user_data)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El email ya está registrado"
+            )
+        return await idempotency.respond(UserResponse.model_validate(user), status_code=status.HTTP_201_CREATED)
+
+@router.post("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    batch: UserBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Obtener varios usuarios por ID en una sola request (requiere autenticación)
+    
+    Reemplaza N llamadas a `GET /users/{user_id}` (p. ej. al mostrar los
+    participantes de un pool) por una sola consulta. Los usuarios vuelven en
+    el orden pedido y los IDs inexistentes se reportan en `missing`.
+    """
+    if len(batch.ids) > settings.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.USER_BATCH_MAX_IDS} IDs por consulta"
+        )
+    
+    users, missing = await AsyncUserService.get_users_by_ids(db, batch.ids)
+    return UserBatchResponse(items=users, missing=missing)
+
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_import_operator)
+):
+    """
+    Importación masiva de usuarios (solo operadores: USER_IMPORT_OPERATORS)
+    
+    Acepta el cuerpo como arreglo JSON (`application/json`), NDJSON
+    (`application/x-ndjson`) o CSV (`text/csv`, columnas email,name,password),
+    o bien un archivo `file` en `multipart/form-data`.
+    
+    Retorna el resultado de cada fila (created / duplicate / invalid) y el
+    throughput en filas por segundo. Limitada por IP y por usuario (429) y
+    registrada en la bitácora de auditoría.
+    """
+    # Antes de leer el cuerpo o hashear: es el endpoint con más bcrypt por request
+    await rate_limiter.check(request, "import_users", user_id=str(current_user.id))
+    
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise ImportFormatError("Falta el archivo 'file' en el formulario")
+            format = detect_format(upload.content_type, upload.filename)
+            data = await upload.read()
+        else:
+            format = detect_format(content_type)
+            data = await request.body()
+        rows = parse_rows(data, format)
+    except ImportFormatError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado"
+            detail=str(e)
         )
     
-    return UserService.create_user(db, user_data)
+    if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.USER_IMPORT_MAX_ROWS} usuarios por importación"
+        )
+    
+    return await AsyncUserService.bulk_create_users(
+        db, rows, batch_size=settings.USER_IMPORT_BATCH_SIZE, imported_by=current_user
+    )
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user_complete(
+async def update_user_complete(
     user_id: UUID, 
     user_data: UserCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Actualizar usuario completo (solo el propio usuario puede actualizarse)"""
@@ -65,7 +231,7 @@ def update_user_complete(
             detail="No tienes permisos para actualizar este usuario"
         )
     
-    user = UserService.update_user(db, user_id, UserUpdate(**user_data.dict()))
+    user = await AsyncUserService.update_user(db, user_id, UserUpdate(**user_data.dict()))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,10 +240,10 @@ def update_user_complete(
     return user
 
 @router.patch("/{user_id}", response_model=UserResponse)
-def update_user_partial(
+async def update_user_partial(
     user_id: UUID, 
     user_data: UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Actualizar usuario parcial (solo el propio usuario puede actualizarse)"""
@@ -88,7 +254,7 @@ def update_user_partial(
             detail="No tienes permisos para actualizar este usuario"
         )
     
-    user = UserService.update_user(db, user_id, user_data)
+    user = await AsyncUserService.update_user(db, user_id, user_data)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,9 +263,9 @@ def update_user_partial(
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Eliminar usuario (solo el propio usuario puede eliminarse)"""
@@ -110,7 +276,13 @@ def delete_user(
             detail="No tienes permisos para eliminar este usuario"
         )
     
-    success = UserService.delete_user(db, user_id)
+    try:
+        success = await AsyncUserService.delete_user(db, user_id)
+    except UserHasTransactionsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
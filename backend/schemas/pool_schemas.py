@@ -0,0 +1,93 @@
+from pydantic import BaseModel, Field, condecimal
+from typing import List, Literal, Optional
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+
+# Montos con dos decimales (Numeric(15, 2) en la base de datos)
+Amount = condecimal(gt=0, max_digits=15, decimal_places=2)
+
+PoolStatus = Literal["active", "completed", "cancelled"]
+PoolVisibility = Literal["private", "public", "link_only"]
+
+class PoolBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+
+class PoolCreate(PoolBase):
+    target_amount: Amount = Field(..., description="Monto objetivo de la colecta")
+    visibility: PoolVisibility = "private"
+
+class PoolResponse(PoolBase):
+    id: int
+    organizer_id: Optional[UUID] = None
+    is_active: bool
+    status: str
+    visibility: str
+    target_amount: Decimal
+    current_amount: Decimal
+    contributor_count: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class OrganizerSummary(BaseModel):
+    """Datos públicos del organizador incluidos en los listados"""
+    id: UUID
+    name: str
+
+    class Config:
+        from_attributes = True
+
+class PoolSummary(BaseModel):
+    """Pool en un listado: datos de resumen y progreso, con su organizador"""
+    id: int
+    name: str
+    is_active: bool
+    status: str
+    visibility: str
+    target_amount: Decimal
+    current_amount: Decimal
+    contributor_count: int
+    created_at: datetime
+    organizer: Optional[OrganizerSummary] = None
+
+    class Config:
+        from_attributes = True
+
+class PoolPage(BaseModel):
+    """Página de pools con paginación por cursor"""
+    items: List[PoolSummary]
+    next_cursor: Optional[str] = None
+
+class ContributionCreate(BaseModel):
+    amount: Amount = Field(..., description="Monto de la contribución")
+
+class TransactionResponse(BaseModel):
+    id: UUID
+    pool_id: int
+    user_id: UUID
+    transaction_type: str  # "contribution" o "refund"
+    amount: Decimal
+    status: str  # "completed" o "refunded"
+    refund_of_id: Optional[UUID] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class PoolCounterDrift(BaseModel):
+    """Diferencia entre los contadores de un pool y su ledger"""
+    pool_id: int
+    current_amount: Decimal
+    ledger_amount: Decimal
+    contributor_count: int
+    ledger_contributor_count: int
+
+class PoolReconciliationResult(BaseModel):
+    """Resultado de la reconciliación de contadores contra el ledger"""
+    pools_checked: int
+    drifted: List[PoolCounterDrift]
+    fixed: bool
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 import re
@@ -69,6 +69,47 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserBatchRequest(BaseModel):
+    """IDs a obtener en una sola consulta (los repetidos se ignoran)"""
+    ids: List[UUID] = Field(..., min_length=1)
+
+class UserBatchResponse(BaseModel):
+    """Usuarios encontrados (en el orden pedido) e IDs inexistentes"""
+    items: List[UserResponse]
+    missing: List[UUID]
+
+class UserSearchResult(BaseModel):
+    """Resultado de la búsqueda de usuarios (type-ahead)"""
+    id: UUID
+    email: EmailStr
+    name: str
+    
+    class Config:
+        from_attributes = True
+
+class UserPage(BaseModel):
+    """Página de usuarios con paginación por cursor"""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+class UserImportRowResult(BaseModel):
+    """Resultado de una fila de la importación masiva"""
+    row: int  # Índice de la fila (desde 0)
+    email: Optional[str] = None
+    status: str  # "created", "duplicate" o "invalid"
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class UserImportResult(BaseModel):
+    """Resumen de la importación masiva de usuarios"""
+    total: int
+    created: int
+    duplicates: int
+    invalid: int
+    elapsed_seconds: float
+    rows_per_second: float
+    results: List[UserImportRowResult]
+
 class UserResponseWithToken(UserResponse):
     access_token: str
     token_type: str = "bearer"
@@ -0,0 +1,102 @@
+"""
+Servidor de producción fuera de Vercel: gunicorn con workers de uvicorn
+
+Un solo proceso de uvicorn usa un núcleo, y bcrypt (utils/auth.py) es CPU
+intensivo. Este launcher levanta varios workers sobre el mismo puerto:
+
+- Workers: WEB_CONCURRENCY, o uno por CPU disponible para el proceso
+  (respeta la afinidad/cpuset del contenedor).
+- La app se importa en el proceso maestro antes del fork (preload), así que
+  los workers comparten las páginas de código y arrancan rápido.
+- post_fork descarta los pools de conexiones heredados del maestro
+  (database.reset_engines_after_fork): cada worker abre los suyos.
+- Reciclado de workers cada SERVER_MAX_REQUESTS requests (con jitter para
+  que no se reinicien todos a la vez) y apagado ordenado con
+  SERVER_GRACEFUL_TIMEOUT segundos para terminar las requests en curso.
+
+Reinicios: SIGHUP reinicia los workers de forma ordenada. Con preload el
+código no se recarga con SIGHUP; para desplegar código nuevo se envía USR2
+(nuevo maestro) y luego TERM al maestro anterior.
+
+El pool de la base de datos (DB_POOL_SIZE, DB_MAX_OVERFLOW) y el de bcrypt
+son por worker. Si HASH_POOL_SIZE no está definido, los núcleos se reparten
+entre los workers en lugar de que cada uno use todos.
+
+Uso (desde backend/):
+    python -m server
+    WEB_CONCURRENCY=4 PORT=8080 python -m server
+"""
+
+import os
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def available_cpus() -> int:
+    """CPUs que el proceso puede usar (afinidad del contenedor si existe)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def get_worker_count() -> int:
+    """WEB_CONCURRENCY o, si no está definido, un worker por CPU disponible"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return available_cpus()
+
+
+def post_fork(server, worker) -> None:
+    """Hook de gunicorn en cada worker recién creado"""
+    import database
+
+    database.reset_engines_after_fork()
+
+
+def get_options() -> Dict[str, Any]:
+    """Configuración de gunicorn a partir del entorno"""
+    workers = get_worker_count()
+    return {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": int(os.getenv("SERVER_MAX_REQUESTS", "10000")),
+        "max_requests_jitter": int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000")),
+        "graceful_timeout": int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+        # Un worker que no responde en este tiempo se reinicia
+        "timeout": int(os.getenv("SERVER_TIMEOUT", "60")),
+        "keepalive": int(os.getenv("SERVER_KEEPALIVE", "5")),
+        "accesslog": "-" if os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true" else None,
+        "loglevel": os.getenv("SERVER_LOG_LEVEL", "info"),
+        "post_fork": post_fork,
+    }
+
+
+def run() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    options = get_options()
+    # Repartir los núcleos entre los workers para bcrypt (antes de importar config)
+    os.environ.setdefault("HASH_POOL_SIZE", str(max(1, available_cpus() // options["workers"])))
+
+    class Server(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    Server().run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,227 @@
+"""
+Bitácora de auditoría con escritura diferida en lotes (write-behind)
+
+Un INSERT por evento dentro de authenticate_user, update_user o delete_user
+agregaría otro round trip al pooler en cada request. En su lugar,
+AuditLogger.record() arma la fila y la deja en una asyncio.Queue (del orden
+de microsegundos, sin I/O), y una tarea en segundo plano la escribe junto con
+las demás en una sola transacción cuando el lote llega a AUDIT_LOG_BATCH_SIZE
+eventos o pasa AUDIT_LOG_FLUSH_INTERVAL_SECONDS desde el primero.
+
+El lote se ejecuta como executemany de una sentencia ya compilada: asyncpg lo
+envía en un único round trip (pipeline), psycopg2 lo convierte en INSERT
+multi-fila (insertmanyvalues) y SQLite lo ejecuta en proceso. Armar un
+`VALUES (...), (...)` propio obligaría a compilar una sentencia distinta por
+tamaño de lote (~6 veces más lento en bench_audit_log).
+
+record() es seguro desde cualquier hilo: UserService (síncrono) corre en el
+threadpool de FastAPI, y fuera del event loop del flusher el evento se
+encola con call_soon_threadsafe.
+
+La cola está acotada (AUDIT_LOG_MAX_QUEUE): si la base de datos no da abasto
+los eventos nuevos se descartan y se cuentan en
+audit_events_total{outcome="dropped"}, en lugar de crecer en memoria o frenar
+las requests. El lifespan detiene la tarea y escribe lo pendiente al apagar.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert
+
+from config import settings
+from database import get_async_engine
+from models import AuditLog, utcnow
+from utils.metrics import Counter
+
+AUDIT_EVENTS = Counter(
+    "audit_events_total",
+    "Eventos de auditoría por resultado (written, dropped, failed)",
+    ("outcome",),
+)
+
+# Eventos registrados por AsyncUserService
+LOGIN_SUCCEEDED = "login_succeeded"
+LOGIN_FAILED = "login_failed"
+USER_UPDATED = "user_updated"
+USER_DELETED = "user_deleted"
+USERS_IMPORTED = "users_imported"
+
+
+class AuditLogger:
+    """Cola acotada de eventos de auditoría con un flusher por lotes"""
+
+    def __init__(self, batch_size: int, flush_interval_seconds: float, max_queue: int, enabled: bool = True):
+        """
+        Args:
+            batch_size (int): Eventos por escritura (dispara la escritura al completarse)
+            flush_interval_seconds (float): Espera máxima de un evento antes de escribirse
+            max_queue (int): Eventos pendientes como máximo (los que excedan se descartan)
+            enabled (bool): Si es False, record() no hace nada
+        """
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.enabled = enabled
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Métricas
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._batches = 0
+        self._last_flush_ms = 0.0
+
+    def record(
+        self,
+        event: str,
+        user_id: Optional[UUID] = None,
+        email: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Encola un evento (no bloquea ni hace I/O)
+
+        Args:
+            event (str): Tipo de evento (LOGIN_SUCCEEDED, USER_UPDATED, ...)
+            user_id (UUID, optional): Usuario afectado
+            email (str, optional): Email involucrado
+            details (dict, optional): Datos adicionales serializables a JSON (sin secretos)
+        """
+        if not self.enabled:
+            return
+        row = {
+            "id": uuid.uuid4(),
+            "occurred_at": utcnow(),
+            "event": event,
+            "user_id": user_id,
+            "email": email,
+            "details": json.dumps(details) if details else None,
+        }
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                # asyncio.Queue no es thread-safe: encolar desde el loop del flusher
+                loop.call_soon_threadsafe(self._enqueue, row)
+                return
+        self._enqueue(row)
+
+    def _enqueue(self, row: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            AUDIT_EVENTS.inc(("dropped",))
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            async with get_async_engine().begin() as connection:
+                await connection.execute(insert(AuditLog), batch)
+        except Exception as e:
+            # Sin reintentos: el lote se pierde pero la cola sigue drenándose
+            self._failed += len(batch)
+            AUDIT_EVENTS.inc(("failed",), len(batch))
+            print(f"[ERROR] No se pudieron escribir {len(batch)} eventos de auditoría: {type(e).__name__}: {e}")
+            return
+        self._written += len(batch)
+        self._batches += 1
+        self._last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+        AUDIT_EVENTS.inc(("written",), len(batch))
+
+    def _drain(self, batch: List[Dict[str, Any]]) -> None:
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.flush_interval_seconds
+                self._drain(batch)
+                while len(batch) < self.batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                    self._drain(batch)
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # Al apagar, el lote en curso también se escribe (si el INSERT
+                # se canceló, la transacción se revirtió)
+                if batch:
+                    await self._write(batch)
+                raise
+
+    async def flush(self) -> int:
+        """
+        Escribe ya todos los eventos encolados (en lotes de batch_size)
+
+        Returns:
+            int: Eventos procesados
+        """
+        processed = 0
+        while not self._queue.empty():
+            batch: List[Dict[str, Any]] = []
+            self._drain(batch)
+            await self._write(batch)
+            processed += len(batch)
+        return processed
+
+    def start(self) -> None:
+        """Inicia el flusher (llamar desde el lifespan)"""
+        if self.enabled and (self._task is None or self._task.done()):
+            # asyncio.Queue queda ligada al primer event loop que espera en ella:
+            # una cola nueva (con lo pendiente) para el loop de este lifespan
+            pending, self._queue = self._queue, asyncio.Queue(maxsize=self._queue.maxsize)
+            while not pending.empty():
+                self._queue.put_nowait(pending.get_nowait())
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el flusher y escribe los eventos pendientes"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize(),
+            "written": self._written,
+            "dropped": self._dropped,
+            "failed": self._failed,
+            "batches": self._batches,
+            "last_flush_ms": self._last_flush_ms,
+        }
+
+
+audit_logger = AuditLogger(
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+    max_queue=settings.AUDIT_LOG_MAX_QUEUE,
+    enabled=settings.AUDIT_LOG_ENABLED,
+)
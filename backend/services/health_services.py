@@ -0,0 +1,118 @@
+"""
+Sondeo de salud de la base de datos en segundo plano
+
+En lugar de abrir conexiones nuevas en cada llamada a /health, un sondeo
+periódico ejecuta `SELECT 1` sobre el pool asíncrono y guarda el último
+resultado con su latencia. /health responde con ese resultado en tiempo
+constante; si está vencido, lo sirve igual y dispara un nuevo sondeo en
+segundo plano (stale-while-revalidate), lo que también cubre entornos
+serverless donde la tarea periódica no corre entre invocaciones.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from config import settings
+from database import get_async_engine
+
+
+class HealthProber:
+    """Sondeo periódico de la base de datos con resultado cacheado"""
+    
+    def __init__(self, interval_seconds: float, timeout_seconds: float, stale_after_seconds: float):
+        """
+        Args:
+            interval_seconds (float): Intervalo entre sondeos de la tarea periódica
+            timeout_seconds (float): Tiempo máximo de cada sondeo
+            stale_after_seconds (float): Edad a partir de la cual el resultado se revalida
+        """
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at_monotonic = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+    
+    async def _probe(self) -> None:
+        async with get_async_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    
+    async def refresh(self) -> Dict[str, Any]:
+        """Ejecuta un sondeo y guarda su resultado"""
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(self._probe(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            error = f"Timeout tras {self.timeout_seconds}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        
+        self._result = {
+            "healthy": error is None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "error": error,
+        }
+        self._checked_at_monotonic = time.monotonic()
+        if error is not None:
+            print(f"[ERROR] Sondeo de base de datos fallido: {error}")
+        return self._result
+    
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+    
+    async def get_status(self) -> Dict[str, Any]:
+        """
+        Retorna el último resultado del sondeo
+        
+        Si aún no hay resultado, espera un primer sondeo. Si el resultado está
+        vencido, se retorna igualmente y se revalida en segundo plano.
+        
+        Returns:
+            dict: healthy, latency_ms, checked_at, error, age_seconds y stale
+        """
+        if self._result is None:
+            self._schedule_refresh()
+            await asyncio.shield(self._refresh_task)
+        
+        age = time.monotonic() - self._checked_at_monotonic
+        stale = age > self.stale_after_seconds
+        if stale:
+            self._schedule_refresh()
+        return {**self._result, "age_seconds": round(age, 3), "stale": stale}
+    
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval_seconds)
+    
+    def start(self) -> None:
+        """Inicia la tarea periódica (llamar desde el lifespan)"""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Detiene la tarea periódica y cualquier sondeo pendiente"""
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = None
+        self._refresh_task = None
+
+
+health_prober = HealthProber(
+    interval_seconds=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    timeout_seconds=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    stale_after_seconds=settings.HEALTH_PROBE_INTERVAL_SECONDS * 2
+)
@@ -0,0 +1,414 @@
+"""
+Servicio de pools: contribuciones, reembolsos y contadores de progreso
+
+El ledger (`transactions`) es la fuente de verdad. `Pool.current_amount` y
+`Pool.contributor_count` son contadores desnormalizados que se actualizan con
+incrementos en SQL (`SET current_amount = current_amount + :monto`) en la
+misma transacción que cada movimiento: no hay lectura-modificación-escritura,
+por lo que contribuciones concurrentes no pierden actualizaciones, y leer el
+progreso de un pool es O(1) sin importar cuántas contribuciones tenga.
+`reconcile_counters` verifica los contadores contra el ledger.
+"""
+
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from uuid import UUID
+import uuid
+
+from sqlalchemy import case, func, insert, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from database import dialect_insert
+from models import Pool, PoolParticipant, Transaction, User, utcnow
+from schemas.pool_schemas import PoolCounterDrift, PoolCreate, PoolReconciliationResult
+from utils.pagination import decode_cursor, encode_cursor
+
+CONTRIBUTION = "contribution"
+REFUND = "refund"
+COMPLETED = "completed"
+REFUNDED = "refunded"
+ACTIVE = "active"
+PRIVATE = "private"
+
+
+def _participant_upsert(db: AsyncSession, pool_id: int, user_id: UUID, amount: Decimal):
+    """Suma `amount` al aporte neto del usuario y retorna el nuevo aporte"""
+    now = utcnow()
+    statement = dialect_insert(db, PoolParticipant).values(
+        id=uuid.uuid4(),
+        pool_id=pool_id,
+        user_id=user_id,
+        contribution_amount=amount,
+        last_contribution_at=now,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[PoolParticipant.pool_id, PoolParticipant.user_id],
+        set_={
+            "contribution_amount": PoolParticipant.contribution_amount + amount,
+            "last_contribution_at": now,
+        },
+    ).returning(PoolParticipant.contribution_amount)
+
+
+def _is_visible(pool: Pool, user_id: UUID) -> bool:
+    """Un pool privado solo lo ve su organizador"""
+    return pool.visibility != PRIVATE or pool.organizer_id == user_id
+
+
+def _increment_pool(
+    pool_id: int,
+    amount: Decimal,
+    contributors: int,
+    only_active: bool = False,
+    visible_to: Optional[UUID] = None
+):
+    """UPDATE pools SET current_amount = current_amount + :amount, ... RETURNING id"""
+    statement = update(Pool).where(Pool.id == pool_id)
+    if only_active:
+        statement = statement.where(Pool.is_active.is_(True), Pool.status == ACTIVE)
+    if visible_to is not None:
+        # Misma regla que _is_visible, dentro del UPDATE (sin un SELECT previo)
+        statement = statement.where(or_(Pool.visibility != PRIVATE, Pool.organizer_id == visible_to))
+    values = {"current_amount": Pool.current_amount + amount}
+    if contributors:
+        values["contributor_count"] = Pool.contributor_count + contributors
+    return statement.values(**values).returning(Pool.id)
+
+
+def _ledger_totals():
+    """Monto neto y número de contribuyentes (aporte neto > 0) por pool según el ledger"""
+    signed_amount = case(
+        (Transaction.transaction_type == REFUND, -Transaction.amount),
+        else_=Transaction.amount,
+    )
+    per_user = (
+        select(
+            Transaction.pool_id,
+            Transaction.user_id,
+            func.sum(signed_amount).label("net_amount"),
+        )
+        .group_by(Transaction.pool_id, Transaction.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            per_user.c.pool_id,
+            func.sum(per_user.c.net_amount).label("amount"),
+            func.sum(case((per_user.c.net_amount > 0, 1), else_=0)).label("contributors"),
+        )
+        .group_by(per_user.c.pool_id)
+        .subquery()
+    )
+
+
+class PoolService:
+    """Operaciones de pools (asíncronas, sobre AsyncSession)"""
+
+    @staticmethod
+    async def create_pool(db: AsyncSession, pool_data: PoolCreate, organizer_id: UUID) -> Pool:
+        """Crear un nuevo pool con los contadores en cero"""
+        db_pool = Pool(
+            organizer_id=organizer_id,
+            name=pool_data.name,
+            description=pool_data.description,
+            visibility=pool_data.visibility,
+            status=ACTIVE,
+            target_amount=pool_data.target_amount,
+            current_amount=0,
+            contributor_count=0,
+        )
+        db.add(db_pool)
+        await db.commit()
+        await db.refresh(db_pool)
+        return db_pool
+
+    @staticmethod
+    async def get_pool(db: AsyncSession, pool_id: int, user_id: Optional[UUID] = None) -> Optional[Pool]:
+        """
+        Obtener un pool por ID (el progreso viene en la misma fila, O(1))
+
+        Args:
+            db: Sesión asíncrona de base de datos
+            pool_id (int): ID del pool
+            user_id (UUID, optional): Usuario que consulta; si se indica, un pool
+                privado de otro organizador se trata como inexistente
+
+        Returns:
+            Pool, o None si no existe o no es visible para el usuario
+        """
+        pool = await db.get(Pool, pool_id)
+        if pool is None or (user_id is not None and not _is_visible(pool, user_id)):
+            return None
+        return pool
+
+    @staticmethod
+    async def list_pools(
+        db: AsyncSession,
+        organizer_id: Optional[UUID] = None,
+        is_active: Optional[bool] = None,
+        status: Optional[str] = None,
+        visibility: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Pool], Optional[str]]:
+        """
+        Listar pools filtrados, del más reciente al más antiguo, con su organizador
+
+        Cada página cuesta siempre dos consultas sin importar su tamaño: los
+        pools (keyset sobre created_at, id, cubierto por los índices
+        compuestos de organizer_id/is_active y visibility/status) y sus
+        organizadores con un único SELECT ... WHERE id IN (...) (selectinload).
+
+        Args:
+            db: Sesión asíncrona de base de datos
+            organizer_id (UUID, optional): Solo pools de este organizador
+            is_active (bool, optional): Filtrar por is_active
+            status (str, optional): active, completed o cancelled
+            visibility (str, optional): private, public o link_only
+            limit (int): Tamaño de la página
+            cursor (str, optional): Cursor retornado por la página anterior
+
+        Returns:
+            Tupla (pools, next_cursor); next_cursor es None en la última página
+
+        Raises:
+            InvalidCursorError: Si el cursor está mal formado
+        """
+        query = (
+            select(Pool)
+            .options(selectinload(Pool.organizer).options(load_only(User.id, User.name)))
+            .order_by(Pool.created_at.desc(), Pool.id.desc())
+        )
+        if organizer_id is not None:
+            query = query.where(Pool.organizer_id == organizer_id)
+        if is_active is not None:
+            query = query.where(Pool.is_active.is_(is_active))
+        if status is not None:
+            query = query.where(Pool.status == status)
+        if visibility is not None:
+            query = query.where(Pool.visibility == visibility)
+        if cursor is not None:
+            created_at, last_id = decode_cursor(cursor, id_type=int)
+            query = query.where(tuple_(Pool.created_at, Pool.id) < tuple_(created_at, last_id))
+
+        # Pedir una fila extra para saber si hay página siguiente
+        pools = list((await db.execute(query.limit(limit + 1))).scalars().all())
+
+        next_cursor = None
+        if len(pools) > limit:
+            pools = pools[:limit]
+            next_cursor = encode_cursor(pools[-1].created_at, pools[-1].id)
+        return pools, next_cursor
+
+    @staticmethod
+    async def get_transaction(db: AsyncSession, transaction_id: UUID) -> Optional[Transaction]:
+        """Obtener un movimiento del ledger por ID"""
+        return await db.get(Transaction, transaction_id)
+
+    @staticmethod
+    async def contribute(db: AsyncSession, pool_id: int, user_id: UUID, amount: Decimal) -> Optional[Transaction]:
+        """
+        Registrar una contribución y actualizar los contadores del pool
+
+        El movimiento, el aporte del participante y los contadores del pool se
+        escriben en una sola transacción. El UPDATE del pool (la fila más
+        disputada) va al final para retener su lock el menor tiempo posible.
+
+        Args:
+            db: Sesión asíncrona de base de datos
+            pool_id (int): Pool al que se contribuye
+            user_id (UUID): Usuario que contribuye
+            amount (Decimal): Monto positivo de la contribución
+
+        Returns:
+            Transaction registrada, o None si el pool no existe, no está activo
+            o es privado de otro organizador
+        """
+        try:
+            transaction = (await db.execute(
+                insert(Transaction)
+                .values(
+                    id=uuid.uuid4(),
+                    pool_id=pool_id,
+                    user_id=user_id,
+                    transaction_type=CONTRIBUTION,
+                    amount=amount,
+                    status=COMPLETED,
+                )
+                .returning(Transaction)
+            )).scalar_one()
+
+            contribution = (await db.execute(_participant_upsert(db, pool_id, user_id, amount))).scalar_one()
+            # Primer aporte (o primero después de un reembolso total): nuevo contribuyente
+            new_contributor = 1 if contribution == amount else 0
+
+            updated = (await db.execute(
+                _increment_pool(pool_id, amount, new_contributor, only_active=True, visible_to=user_id)
+            )).scalar_one_or_none()
+        except IntegrityError:
+            # El pool no existe (violación de la llave foránea en PostgreSQL)
+            await db.rollback()
+            return None
+
+        if updated is None:
+            await db.rollback()
+            return None
+
+        await db.commit()
+        return transaction
+
+    @staticmethod
+    async def refund(db: AsyncSession, transaction_id: UUID, user_id: UUID) -> Optional[Transaction]:
+        """
+        Reembolsar una contribución completa del usuario
+
+        La contribución se marca como reembolsada con un UPDATE condicional
+        (`WHERE status = 'completed'`), así dos reembolsos concurrentes de la
+        misma contribución no pueden descontar dos veces.
+
+        Args:
+            db: Sesión asíncrona de base de datos
+            transaction_id (UUID): Contribución a reembolsar
+            user_id (UUID): Usuario dueño de la contribución
+
+        Returns:
+            Transaction del reembolso, o None si la contribución no existe,
+            no es del usuario o ya fue reembolsada
+        """
+        claimed = (await db.execute(
+            update(Transaction)
+            .where(
+                Transaction.id == transaction_id,
+                Transaction.user_id == user_id,
+                Transaction.transaction_type == CONTRIBUTION,
+                Transaction.status == COMPLETED,
+            )
+            .values(status=REFUNDED)
+            .returning(Transaction.pool_id, Transaction.amount)
+        )).first()
+        if claimed is None:
+            await db.rollback()
+            return None
+        pool_id, amount = claimed
+
+        refund = (await db.execute(
+            insert(Transaction)
+            .values(
+                id=uuid.uuid4(),
+                pool_id=pool_id,
+                user_id=user_id,
+                transaction_type=REFUND,
+                amount=amount,
+                status=COMPLETED,
+                refund_of_id=transaction_id,
+            )
+            .returning(Transaction)
+        )).scalar_one()
+
+        contribution = (await db.execute(_participant_upsert(db, pool_id, user_id, -amount))).scalar_one()
+        # Aporte neto en cero: deja de contar como contribuyente
+        lost_contributor = -1 if contribution <= 0 else 0
+
+        await db.execute(_increment_pool(pool_id, -amount, lost_contributor))
+        await db.commit()
+        return refund
+
+    @staticmethod
+    async def reconcile_counters(
+        db: AsyncSession,
+        pool_ids: Optional[List[int]] = None,
+        fix: bool = False
+    ) -> PoolReconciliationResult:
+        """
+        Comparar los contadores de los pools con los totales del ledger
+
+        Args:
+            db: Sesión asíncrona de base de datos
+            pool_ids (List[int], optional): Pools a revisar (todos por defecto)
+            fix (bool): Corregir los contadores (y aportes de participantes) con desvío
+
+        Returns:
+            PoolReconciliationResult: Pools revisados y desvíos encontrados
+        """
+        ledger = _ledger_totals()
+        statement = (
+            select(
+                Pool.id,
+                Pool.current_amount,
+                Pool.contributor_count,
+                func.coalesce(ledger.c.amount, 0),
+                func.coalesce(ledger.c.contributors, 0),
+            )
+            .outerjoin(ledger, ledger.c.pool_id == Pool.id)
+            .order_by(Pool.id)
+        )
+        if pool_ids:
+            statement = statement.where(Pool.id.in_(pool_ids))
+
+        checked = 0
+        drifted: List[PoolCounterDrift] = []
+        for pool_id, current_amount, contributor_count, ledger_amount, ledger_contributors in await db.execute(statement):
+            checked += 1
+            ledger_amount = Decimal(str(ledger_amount)).quantize(Decimal("0.01"))
+            if Decimal(current_amount) != ledger_amount or contributor_count != ledger_contributors:
+                drifted.append(PoolCounterDrift(
+                    pool_id=pool_id,
+                    current_amount=current_amount,
+                    ledger_amount=ledger_amount,
+                    contributor_count=contributor_count,
+                    ledger_contributor_count=ledger_contributors,
+                ))
+
+        if fix:
+            for drift in drifted:
+                await PoolService._rebuild_counters(db, drift.pool_id)
+        return PoolReconciliationResult(pools_checked=checked, drifted=drifted, fixed=fix)
+
+    @staticmethod
+    async def _rebuild_counters(db: AsyncSession, pool_id: int) -> None:
+        """Recalcula los contadores de un pool y los aportes de sus participantes desde el ledger"""
+        # Bloquear las filas para no competir con contribuciones en curso (PostgreSQL), en
+        # el mismo orden que contribute y refund: primero los participantes (el upsert)
+        # y al final el pool (su UPDATE). En el orden inverso, una contribución con su
+        # participante bloqueado esperando el pool y este job con el pool bloqueado
+        # esperando ese participante formarían un deadlock.
+        await db.execute(
+            select(PoolParticipant.id)
+            .where(PoolParticipant.pool_id == pool_id)
+            .order_by(PoolParticipant.user_id)
+            .with_for_update()
+        )
+        await db.execute(select(Pool.id).where(Pool.id == pool_id).with_for_update())
+
+        signed_amount = case(
+            (Transaction.transaction_type == REFUND, -Transaction.amount),
+            else_=Transaction.amount,
+        )
+        net_amount = (
+            select(func.coalesce(func.sum(signed_amount), 0))
+            .where(Transaction.pool_id == PoolParticipant.pool_id, Transaction.user_id == PoolParticipant.user_id)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(PoolParticipant)
+            .where(PoolParticipant.pool_id == pool_id)
+            .values(contribution_amount=net_amount)
+            .execution_options(synchronize_session=False)
+        )
+
+        ledger = _ledger_totals()
+        amount, contributors = (await db.execute(
+            select(func.coalesce(ledger.c.amount, 0), func.coalesce(ledger.c.contributors, 0))
+            .select_from(Pool)
+            .outerjoin(ledger, ledger.c.pool_id == Pool.id)
+            .where(Pool.id == pool_id)
+        )).one()
+        await db.execute(
+            update(Pool)
+            .where(Pool.id == pool_id)
+            .values(current_amount=amount, contributor_count=contributors)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
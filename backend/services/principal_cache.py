@@ -0,0 +1,80 @@
+"""
+Caché de principals autenticados
+
+get_current_user resuelve el usuario del token (campo `sub` = email) en cada
+request autenticado. Esta caché guarda el User ya resuelto para que el
+tráfico de lectura no pague un round trip a la base de datos solo para
+identificar al llamador. UserService invalida las entradas al actualizar o
+eliminar usuarios.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from config import settings
+from utils.cache import TTLCache
+
+
+class PrincipalCache:
+    """Caché TTL+LRU de usuarios autenticados indexada por subject del token"""
+    
+    def __init__(self, max_size: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        # Índice inverso user_id -> subject para invalidar por ID
+        self._subjects: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, subject: str) -> Optional[Any]:
+        """Retorna el usuario cacheado para el subject o None"""
+        if not self.enabled:
+            return None
+        return self._cache.get(subject)
+    
+    def set(self, subject: str, user: Any) -> None:
+        """Cachea el usuario resuelto para el subject"""
+        if not self.enabled:
+            return
+        self._cache.set(subject, user)
+        with self._lock:
+            if len(self._subjects) > self._cache.max_size * 2:
+                # Purgar referencias de entradas ya desalojadas
+                self._subjects = {
+                    user_id: key for user_id, key in self._subjects.items()
+                    if key in self._cache
+                }
+            self._subjects[user.id] = subject
+    
+    def invalidate(self, subject: Optional[str] = None, user_id: Optional[UUID] = None) -> None:
+        """
+        Invalida las entradas de un usuario
+        
+        Args:
+            subject (str, optional): Subject del token (email)
+            user_id (UUID, optional): ID del usuario (invalida su subject conocido)
+        """
+        if subject is not None:
+            self._cache.pop(subject)
+        if user_id is not None:
+            with self._lock:
+                known_subject = self._subjects.pop(user_id, None)
+            if known_subject is not None:
+                self._cache.pop(known_subject)
+    
+    def clear(self) -> None:
+        """Vacía la caché"""
+        self._cache.clear()
+        with self._lock:
+            self._subjects.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de aciertos/fallos"""
+        return {"enabled": self.enabled, **self._cache.stats()}
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED
+)
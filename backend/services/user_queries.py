@@ -0,0 +1,35 @@
+"""
+Sentencias precompiladas para las lecturas más frecuentes de usuarios
+
+Cada consulta se construye una sola vez al importar el módulo, con sus
+valores como `bindparam`, y se ejecuta pasando los parámetros:
+
+    db.execute(USER_BY_EMAIL, {"email": email})
+
+Construir `select(User).where(...)` (o `db.query(User).filter(...)`) en cada
+llamada cuesta CPU aunque SQLAlchemy encuentre el SQL en su caché de
+compilación: hay que armar el árbol de la sentencia y recalcular su clave de
+caché. Con la sentencia ya construida la clave queda memorizada y la
+búsqueda en la caché de compilación (por engine, ver DB_COMPILED_CACHE_SIZE)
+es directa.
+
+Del lado del servidor, database.DB_STATEMENT_MODE decide si además se usan
+prepared statements (conexión directa) o solo la caché del cliente
+(Transaction Pooler de Supabase).
+"""
+
+from sqlalchemy import bindparam, select
+
+from models import User
+
+# :user_id
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# :email
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# :email (solo el índice único de email, sin cargar la fila)
+EMAIL_EXISTS = select(User.id).where(User.email == bindparam("email")).limit(1)
+
+# :skip, :limit
+USERS_PAGE = select(User).offset(bindparam("skip")).limit(bindparam("limit"))
@@ -0,0 +1,201 @@
+"""
+Índice de prefijos en memoria para la búsqueda de usuarios
+
+En PostgreSQL la búsqueda usa índices GIN de pg_trgm (ver models.User). En
+SQLite (desarrollo local, benchmarks) no hay índices de trigramas y un
+`LIKE '%q%'` recorre toda la tabla, así que AsyncUserService.search_users usa
+este índice: una lista ordenada de claves (email, nombre completo y cada
+palabra del nombre, en minúsculas) donde un prefijo se resuelve con búsqueda
+binaria en O(log n + k).
+
+El índice se construye en la primera búsqueda y UserService lo mantiene al
+crear, actualizar o eliminar usuarios (como la caché de principals). Los
+cambios hechos por otros procesos se incorporan al reconstruirlo cuando
+vence su TTL.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from config import settings
+
+
+class UserMatch(NamedTuple):
+    id: UUID
+    email: str
+    name: str
+
+
+# Relevancia de una coincidencia (menor es mejor)
+EXACT = 0
+EMAIL_PREFIX = 1
+NAME_PREFIX = 2
+WORD_PREFIX = 3
+
+
+def _keys(email: str, name: str) -> List[str]:
+    """Claves indexadas de un usuario: email, nombre completo y palabras del nombre"""
+    name_key = name.lower()
+    keys = [email.lower(), name_key]
+    # La primera palabra ya es prefijo del nombre completo
+    for word in name_key.split()[1:]:
+        if word not in keys:
+            keys.append(word)
+    return keys
+
+
+def _rank(query: str, user: UserMatch) -> int:
+    email, name = user.email.lower(), user.name.lower()
+    if query == email or query == name:
+        return EXACT
+    if email.startswith(query):
+        return EMAIL_PREFIX
+    if name.startswith(query):
+        return NAME_PREFIX
+    return WORD_PREFIX
+
+
+class UserSearchIndex:
+    """
+    Claves ordenadas con el slot de su usuario en una lista paralela
+
+    Se guardan en dos listas (claves y slots) en lugar de una lista de tuplas:
+    ordenar y buscar comparando solo strings es varias veces más rápido.
+    """
+
+    def __init__(self, ttl_seconds: float, scan_limit: int = 1000):
+        """
+        Args:
+            ttl_seconds (float): Antigüedad máxima antes de reconstruir desde la base
+            scan_limit (int): Claves revisadas como máximo por búsqueda (acota el
+                costo de prefijos muy comunes; las claves más cortas, es decir las
+                coincidencias más exactas, se revisan primero)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.scan_limit = scan_limit
+        self._keys: List[str] = []
+        self._key_slots: List[int] = []
+        self._users: List[Optional[UserMatch]] = []
+        self._slots: Dict[UUID, int] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def is_fresh(self) -> bool:
+        """Si el índice está construido y dentro de su TTL"""
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl_seconds
+
+    def build(self, rows: Iterable[Tuple[UUID, str, str]]) -> None:
+        """
+        Reemplaza el contenido del índice
+
+        Args:
+            rows: Tuplas (id, email, name) de todos los usuarios
+        """
+        users: List[Optional[UserMatch]] = []
+        slots: Dict[UUID, int] = {}
+        keys: List[str] = []
+        key_slots: List[int] = []
+        for user_id, email, name in rows:
+            slot = len(users)
+            users.append(UserMatch(user_id, email, name))
+            slots[user_id] = slot
+            for key in _keys(email, name):
+                keys.append(key)
+                key_slots.append(slot)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        keys = [keys[i] for i in order]
+        key_slots = [key_slots[i] for i in order]
+        with self._lock:
+            self._keys, self._key_slots, self._users, self._slots = keys, key_slots, users, slots
+            self._built_at = time.monotonic()
+
+    def _remove_locked(self, user_id: UUID) -> None:
+        slot = self._slots.pop(user_id, None)
+        if slot is None:
+            return
+        user = self._users[slot]
+        self._users[slot] = None
+        for key in _keys(user.email, user.name):
+            index = bisect.bisect_left(self._keys, key)
+            end = bisect.bisect_right(self._keys, key, lo=index)
+            for position in range(index, end):
+                if self._key_slots[position] == slot:
+                    del self._keys[position]
+                    del self._key_slots[position]
+                    break
+
+    def upsert(self, users: Iterable[Any]) -> None:
+        """
+        Agrega o actualiza usuarios (objetos con id, email y name)
+
+        No hace nada si el índice aún no se construyó: la primera búsqueda lo
+        cargará completo desde la base de datos.
+        """
+        with self._lock:
+            if self._built_at is None:
+                return
+            for user in users:
+                self._remove_locked(user.id)
+                slot = len(self._users)
+                self._users.append(UserMatch(user.id, user.email, user.name))
+                self._slots[user.id] = slot
+                for key in _keys(user.email, user.name):
+                    index = bisect.bisect_right(self._keys, key)
+                    self._keys.insert(index, key)
+                    self._key_slots.insert(index, slot)
+
+    def remove(self, user_id: UUID) -> None:
+        """Quita un usuario del índice (no hace nada si no estaba)"""
+        with self._lock:
+            self._remove_locked(user_id)
+
+    def invalidate(self) -> None:
+        """Fuerza la reconstrucción en la próxima búsqueda"""
+        with self._lock:
+            self._built_at = None
+
+    def search(self, query: str, limit: int) -> List[UserMatch]:
+        """
+        Usuarios cuyo email, nombre o alguna palabra del nombre empieza por `query`
+
+        Ordenados por relevancia: coincidencia exacta, prefijo del email,
+        prefijo del nombre y prefijo de otra palabra; a igual relevancia, por nombre.
+
+        Args:
+            query (str): Texto buscado (se compara en minúsculas)
+            limit (int): Máximo de resultados
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        found: Dict[int, UserMatch] = {}
+        with self._lock:
+            keys = self._keys
+            index = bisect.bisect_left(keys, query)
+            end = min(len(keys), index + self.scan_limit)
+            while index < end and keys[index].startswith(query):
+                slot = self._key_slots[index]
+                found[slot] = self._users[slot]
+                index += 1
+
+        ranked = sorted(found.values(), key=lambda user: (_rank(query, user), user.name.lower(), user.email))
+        return ranked[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "built": self.is_built,
+            "users": len(self._slots),
+            "keys": len(self._keys),
+        }
+
+
+user_search_index = UserSearchIndex(ttl_seconds=settings.USER_SEARCH_INDEX_TTL_SECONDS)
@@ -1,74 +1,214 @@
+from pydantic import ValidationError
+from sqlalchemy import case, delete, func, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from database import dialect_insert
 from models import User
-from schemas.user_schemas import UserCreate, UserCreateDB, UserUpdate, UserUpdateDB
-from utils.auth import hash_password, verify_password
-from typing import Optional, List
+from services.audit_log import (
+    LOGIN_FAILED, LOGIN_SUCCEEDED, USER_DELETED, USER_UPDATED, USERS_IMPORTED, audit_logger
+)
+from services.principal_cache import principal_cache
+from services.user_queries import EMAIL_EXISTS, USER_BY_EMAIL, USER_BY_ID, USERS_PAGE
+from services.user_search import UserMatch, user_search_index
+from schemas.user_schemas import (
+    UserCreate, UserCreateDB, UserUpdate, UserUpdateDB, UserImportResult, UserImportRowResult
+)
+from utils.auth import (
+    hash_password, verify_password, hash_password_async, hash_passwords_async, verify_password_async
+)
+from utils.pagination import decode_cursor, encode_cursor
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence, Tuple, Union
 from uuid import UUID
+import asyncio
+import time
 import uuid
 
+
+class UserHasTransactionsError(Exception):
+    """El usuario tiene movimientos en el ledger de pools y no se puede eliminar"""
+
+
+def _new_user_values(user_data: UserCreate, hashed_password: str) -> Dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "email": user_data.email,
+        "name": user_data.name,
+        "password": hashed_password,
+    }
+
+def _insert_user_returning(db: Union[Session, AsyncSession], values: Dict[str, Any]):
+    """INSERT ... ON CONFLICT (email) DO NOTHING RETURNING * (sin filas si el email ya existe)"""
+    return (
+        dialect_insert(db, User)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+
+def _supports_returning(db: Union[Session, AsyncSession], statement: str) -> bool:
+    """Si el dialecto soporta UPDATE/DELETE ... RETURNING (SQLite >= 3.35, PostgreSQL)"""
+    return bool(getattr(db.bind.dialect, f"{statement}_returning", False))
+
+def _update_user_returning(user_id: UUID, values: Dict[str, Any]):
+    """UPDATE users SET ... WHERE id = :id RETURNING * (un solo round trip)"""
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+        # populate_existing: si la sesión ya cargó al usuario (get_current_user),
+        # refrescarlo con la fila retornada en lugar de conservar los valores viejos
+        # (synchronize_session=False lo impediría; "auto" no agrega consultas)
+        .execution_options(populate_existing=True)
+    )
+
+def _delete_user_returning(user_id: UUID):
+    """DELETE FROM users WHERE id = :id RETURNING id (un solo round trip)"""
+    return (
+        delete(User)
+        .where(User.id == user_id)
+        .returning(User.id)
+    )
+
+def _audit_update(user: User, update_data: Dict[str, Any]) -> None:
+    """Evento de auditoría de una actualización: solo los nombres de los campos, nunca sus valores"""
+    audit_logger.record(USER_UPDATED, user_id=user.id, email=user.email, details={"fields": sorted(update_data)})
+
+def _search_users_statement(query: str, limit: int):
+    """
+    Búsqueda por subcadena en nombre o email para PostgreSQL
+    
+    `ILIKE '%q%'` usa los índices GIN de trigramas (ix_users_*_trgm). Orden:
+    coincidencia exacta, prefijo del email, prefijo del nombre y luego
+    similitud de trigramas.
+    """
+    lowered = query.lower()
+    rank = case(
+        (or_(func.lower(User.email) == lowered, func.lower(User.name) == lowered), 0),
+        (User.email.istartswith(query, autoescape=True), 1),
+        (User.name.istartswith(query, autoescape=True), 2),
+        else_=3,
+    )
+    similarity = func.greatest(func.similarity(User.name, query), func.similarity(User.email, query))
+    return (
+        select(User.id, User.email, User.name)
+        .where(or_(User.name.icontains(query, autoescape=True), User.email.icontains(query, autoescape=True)))
+        .order_by(rank, similarity.desc(), User.name)
+        .limit(limit)
+    )
+
+# Evita que varias búsquedas concurrentes construyan el índice en memoria a la vez
+_search_index_lock = asyncio.Lock()
+
 class UserService:
     
     @staticmethod
     def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Obtener lista de usuarios con paginación"""
-        return db.query(User).offset(skip).limit(limit).all()
+        return list(db.execute(USERS_PAGE, {"skip": skip, "limit": limit}).scalars().all())
     
     @staticmethod
     def get_user_by_id(db: Session, user_id: UUID) -> Optional[User]:
         """Obtener usuario por ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return db.execute(USER_BY_ID, {"user_id": user_id}).scalars().first()
     
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
         """Obtener usuario por email"""
-        return db.query(User).filter(User.email == email).first()
+        return db.execute(USER_BY_EMAIL, {"email": email}).scalars().first()
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
-        """Crear un nuevo usuario con contraseña hasheada"""
+    def email_exists(db: Session, email: str) -> bool:
+        """Indica si el email ya está registrado"""
+        return db.execute(EMAIL_EXISTS, {"email": email}).first() is not None
+    
+    @staticmethod
+    def create_user(db: Session, user_data: UserCreate) -> Optional[User]:
+        """
+        Crear un nuevo usuario con contraseña hasheada
+        
+        Returns:
+            User creado, o None si el email ya estaba registrado
+        """
         # Hashear la contraseña antes de guardarla
         hashed_password = hash_password(user_data.password)
         
-        db_user = User(
-            id=uuid.uuid4(),
-            email=user_data.email,
-            name=user_data.name,
-            password=hashed_password
-        )
-        db.add(db_user)
+        db_user = db.execute(
+            _insert_user_returning(db, _new_user_values(user_data, hashed_password))
+        ).scalar_one_or_none()
         db.commit()
-        db.refresh(db_user)
+        if db_user is not None:
+            user_search_index.upsert([db_user])
         return db_user
     
     @staticmethod
     def update_user(db: Session, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
-        """Actualizar un usuario existente"""
-        db_user = db.query(User).filter(User.id == user_id).first()
-        if not db_user:
-            return None
-        
+        """Actualizar un usuario existente (UPDATE ... RETURNING si el dialecto lo soporta)"""
         update_data = user_data.dict(exclude_unset=True)
         
         # Si se está actualizando la contraseña, hashearla
         if 'password' in update_data and update_data['password'] is not None:
             update_data['password'] = hash_password(update_data['password'])
         
+        if not update_data:
+            return UserService.get_user_by_id(db, user_id)
+        
+        if _supports_returning(db, "update"):
+            db_user = db.execute(_update_user_returning(user_id, update_data)).scalar_one_or_none()
+            db.commit()
+            principal_cache.invalidate(user_id=user_id)
+            if db_user is not None:
+                user_search_index.upsert([db_user])
+                _audit_update(db_user, update_data)
+            return db_user
+        
+        db_user = UserService.get_user_by_id(db, user_id)
+        if not db_user:
+            return None
+        
+        previous_email = db_user.email
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
         db.commit()
+        principal_cache.invalidate(subject=previous_email, user_id=user_id)
         db.refresh(db_user)
+        user_search_index.upsert([db_user])
+        _audit_update(db_user, update_data)
         return db_user
     
     @staticmethod
     def delete_user(db: Session, user_id: UUID) -> bool:
-        """Eliminar un usuario"""
-        db_user = db.query(User).filter(User.id == user_id).first()
-        if not db_user:
-            return False
+        """
+        Eliminar un usuario (DELETE ... RETURNING si el dialecto lo soporta)
         
-        db.delete(db_user)
-        db.commit()
+        Raises:
+            UserHasTransactionsError: Si el usuario tiene movimientos en el ledger
+        """
+        try:
+            if _supports_returning(db, "delete"):
+                deleted_id = db.execute(_delete_user_returning(user_id)).scalar_one_or_none()
+                db.commit()
+                principal_cache.invalidate(user_id=user_id)
+                user_search_index.remove(user_id)
+                if deleted_id is not None:
+                    audit_logger.record(USER_DELETED, user_id=user_id)
+                return deleted_id is not None
+            
+            db_user = UserService.get_user_by_id(db, user_id)
+            if not db_user:
+                return False
+            
+            db.delete(db_user)
+            db.commit()
+        except IntegrityError:
+            # La llave foránea de transactions.user_id impide borrar movimientos del ledger
+            db.rollback()
+            raise UserHasTransactionsError("El usuario tiene contribuciones registradas en pools")
+        principal_cache.invalidate(subject=db_user.email, user_id=user_id)
+        user_search_index.remove(user_id)
+        audit_logger.record(USER_DELETED, user_id=user_id, email=db_user.email)
         return True
 
     @staticmethod
@@ -86,11 +226,14 @@ class UserService:
         """
         user = UserService.get_user_by_email(db, email)
         if not user:
+            audit_logger.record(LOGIN_FAILED, email=email, details={"reason": "unknown_email"})
             return None
             
         if not verify_password(password, user.password):
+            audit_logger.record(LOGIN_FAILED, user_id=user.id, email=email, details={"reason": "wrong_password"})
             return None
         
+        audit_logger.record(LOGIN_SUCCEEDED, user_id=user.id, email=email)
         return user
     
     @staticmethod
@@ -108,11 +251,439 @@ class UserService:
         Raises:
             ValueError: Si el email ya está registrado
         """
-        existing_user = UserService.get_user_by_email(db, user_data.email)
-        if existing_user:
+        # Chequeo barato antes de bcrypt; la unicidad la garantiza el INSERT
+        if UserService.email_exists(db, user_data.email):
             raise ValueError("El email ya está registrado en el sistema")
         
-        return UserService.create_user(db, user_data)
+        db_user = UserService.create_user(db, user_data)
+        if db_user is None:
+            raise ValueError("El email ya está registrado en el sistema")
+        return db_user
 
 
+class AsyncUserService:
+    """
+    Versión asíncrona de UserService para usar con AsyncSession
+
+    Los routers usan esta clase para que las consultas a la base de datos
+    no bloqueen el event loop. UserService (síncrono) se mantiene para
+    scripts y tests.
+    """
+    
+    @staticmethod
+    async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+        """Obtener lista de usuarios con paginación"""
+        result = await db.execute(USERS_PAGE, {"skip": skip, "limit": limit})
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_users_page(
+        db: AsyncSession,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Obtener una página de usuarios con paginación por cursor (keyset)
+        
+        Ordena por (created_at, id) usando el índice ix_users_created_at_id,
+        por lo que el costo no depende de la profundidad de la página y las
+        filas no se desplazan entre páginas cuando se insertan usuarios.
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            limit: Tamaño de la página
+            cursor: Cursor opaco retornado por la página anterior (None = primera página)
+            
+        Returns:
+            Tupla (usuarios, next_cursor); next_cursor es None en la última página
+            
+        Raises:
+            InvalidCursorError: Si el cursor está mal formado
+        """
+        query = select(User).order_by(User.created_at, User.id)
+        if cursor is not None:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.where(tuple_(User.created_at, User.id) > tuple_(created_at, last_id))
+        
+        # Pedir una fila extra para saber si hay página siguiente
+        result = await db.execute(query.limit(limit + 1))
+        users = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+        return users, next_cursor
+    
+    # Columnas públicas incluidas en la exportación (nunca el hash de la contraseña)
+    EXPORT_FIELDS = ("id", "email", "name", "created_at", "updated_at")
+    
+    @staticmethod
+    async def stream_users(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[Sequence]:
+        """
+        Recorrer todos los usuarios en lotes usando un cursor del lado del servidor
+        
+        Selecciona solo columnas (sin construir objetos User) y usa
+        `yield_per`, de modo que la memoria se mantiene constante sin importar
+        el tamaño de la tabla.
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            batch_size: Filas por lote
+            
+        Yields:
+            Lotes de filas con las columnas de EXPORT_FIELDS
+        """
+        columns = [getattr(User, field) for field in AsyncUserService.EXPORT_FIELDS]
+        query = (
+            select(*columns)
+            .order_by(User.created_at, User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(query)
+        try:
+            async for partition in result.partitions():
+                yield partition
+        finally:
+            await result.close()
+    
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: UUID) -> Optional[User]:
+        """Obtener usuario por ID"""
+        result = await db.execute(USER_BY_ID, {"user_id": user_id})
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_users_by_ids(db: AsyncSession, user_ids: Sequence[UUID]) -> Tuple[List[User], List[UUID]]:
+        """
+        Obtener varios usuarios por ID con una sola consulta (WHERE id IN (...))
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            user_ids: IDs pedidos (los repetidos se consultan una vez)
+            
+        Returns:
+            Tupla (usuarios en el orden pedido, IDs que no existen)
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        result = await db.execute(select(User).where(User.id.in_(unique_ids)))
+        found = {user.id: user for user in result.scalars().all()}
+        users = [found[user_id] for user_id in unique_ids if user_id in found]
+        missing = [user_id for user_id in unique_ids if user_id not in found]
+        return users, missing
+    
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        """Obtener usuario por email"""
+        result = await db.execute(USER_BY_EMAIL, {"email": email})
+        return result.scalars().first()
+    
+    @staticmethod
+    async def email_exists(db: AsyncSession, email: str) -> bool:
+        """Indica si el email ya está registrado"""
+        return (await db.execute(EMAIL_EXISTS, {"email": email})).first() is not None
+    
+    @staticmethod
+    async def search_users(db: AsyncSession, query: str, limit: int = 10) -> List[UserMatch]:
+        """
+        Buscar usuarios por nombre o email (type-ahead)
+        
+        En PostgreSQL busca por subcadena con los índices de trigramas; en
+        otros dialectos (SQLite) busca por prefijo del email, del nombre o de
+        cualquier palabra del nombre en el índice en memoria, que se carga
+        desde la base en la primera búsqueda y al vencer su TTL.
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            query: Texto buscado
+            limit: Máximo de resultados
+            
+        Returns:
+            Lista de UserMatch (id, email, name) ordenada por relevancia
+        """
+        if db.bind.dialect.name == "postgresql":
+            rows = (await db.execute(_search_users_statement(query, limit))).all()
+            return [UserMatch(*row) for row in rows]
+        
+        # Mientras otra request reconstruye un índice vencido se sigue usando el anterior
+        stale_but_usable = user_search_index.is_built and _search_index_lock.locked()
+        if not user_search_index.is_fresh and not stale_but_usable:
+            async with _search_index_lock:
+                if not user_search_index.is_fresh:
+                    rows = (await db.execute(select(User.id, User.email, User.name))).all()
+                    # En un hilo para no bloquear el event loop con el ordenamiento
+                    await asyncio.to_thread(user_search_index.build, rows)
+        return user_search_index.search(query, limit)
+    
+    @staticmethod
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> Optional[User]:
+        """
+        Crear un nuevo usuario con contraseña hasheada
+        
+        Usa INSERT ... ON CONFLICT (email) DO NOTHING RETURNING: la fila creada
+        vuelve en la misma sentencia (sin refresh) y un registro concurrente
+        con el mismo email no produce un IntegrityError.
+        
+        Returns:
+            User creado, o None si el email ya estaba registrado
+        """
+        hashed_password = await hash_password_async(user_data.password)
+        
+        db_user = (await db.execute(
+            _insert_user_returning(db, _new_user_values(user_data, hashed_password))
+        )).scalar_one_or_none()
+        await db.commit()
+        if db_user is not None:
+            user_search_index.upsert([db_user])
+        return db_user
+    
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
+        """
+        Actualizar un usuario existente
+        
+        Con UPDATE ... RETURNING la actualización y la lectura de la fila
+        resultante son una sola sentencia (un round trip al pooler en lugar de
+        SELECT + UPDATE + SELECT). Sin soporte de RETURNING se usa el flujo ORM.
+        """
+        update_data = user_data.dict(exclude_unset=True)
+        
+        # Si se está actualizando la contraseña, hashearla
+        if 'password' in update_data and update_data['password'] is not None:
+            update_data['password'] = await hash_password_async(update_data['password'])
+        
+        if not update_data:
+            return await AsyncUserService.get_user_by_id(db, user_id)
+        
+        if _supports_returning(db, "update"):
+            db_user = (await db.execute(_update_user_returning(user_id, update_data))).scalar_one_or_none()
+            await db.commit()
+            # El email anterior no se conoce sin el SELECT: invalidar por ID
+            principal_cache.invalidate(user_id=user_id)
+            if db_user is not None:
+                user_search_index.upsert([db_user])
+                _audit_update(db_user, update_data)
+            return db_user
+        
+        db_user = await AsyncUserService.get_user_by_id(db, user_id)
+        if not db_user:
+            return None
+        
+        previous_email = db_user.email
+        for field, value in update_data.items():
+            setattr(db_user, field, value)
+        
+        await db.commit()
+        principal_cache.invalidate(subject=previous_email, user_id=user_id)
+        await db.refresh(db_user)
+        user_search_index.upsert([db_user])
+        _audit_update(db_user, update_data)
+        return db_user
+    
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: UUID) -> bool:
+        """
+        Eliminar un usuario (DELETE ... RETURNING id si el dialecto lo soporta)
+        
+        Raises:
+            UserHasTransactionsError: Si el usuario tiene movimientos en el ledger
+        """
+        try:
+            if _supports_returning(db, "delete"):
+                deleted_id = (await db.execute(_delete_user_returning(user_id))).scalar_one_or_none()
+                await db.commit()
+                principal_cache.invalidate(user_id=user_id)
+                user_search_index.remove(user_id)
+                if deleted_id is not None:
+                    audit_logger.record(USER_DELETED, user_id=user_id)
+                return deleted_id is not None
+            
+            db_user = await AsyncUserService.get_user_by_id(db, user_id)
+            if not db_user:
+                return False
+            
+            await db.delete(db_user)
+            await db.commit()
+        except IntegrityError:
+            # La llave foránea de transactions.user_id impide borrar movimientos del ledger
+            await db.rollback()
+            raise UserHasTransactionsError("El usuario tiene contribuciones registradas en pools")
+        principal_cache.invalidate(subject=db_user.email, user_id=user_id)
+        user_search_index.remove(user_id)
+        audit_logger.record(USER_DELETED, user_id=user_id, email=db_user.email)
+        return True
 
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        """
+        Autenticar un usuario verificando email y contraseña
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            email: Email del usuario
+            password: Contraseña en texto plano
+            
+        Returns:
+            User si las credenciales son válidas, None en caso contrario
+        """
+        user = await AsyncUserService.get_user_by_email(db, email)
+        if not user:
+            audit_logger.record(LOGIN_FAILED, email=email, details={"reason": "unknown_email"})
+            return None
+            
+        if not await verify_password_async(password, user.password):
+            audit_logger.record(LOGIN_FAILED, user_id=user.id, email=email, details={"reason": "wrong_password"})
+            return None
+        
+        audit_logger.record(LOGIN_SUCCEEDED, user_id=user.id, email=email)
+        return user
+    
+    @staticmethod
+    async def register_user(db: AsyncSession, user_data: UserCreate) -> User:
+        """
+        Registrar un nuevo usuario
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            user_data: Datos del usuario a crear
+            
+        Returns:
+            User creado
+            
+        Raises:
+            ValueError: Si el email ya está registrado
+        """
+        # Chequeo barato antes de bcrypt: un flood de emails duplicados no
+        # consume CPU de hashing. La unicidad la garantiza el INSERT ... ON CONFLICT
+        if await AsyncUserService.email_exists(db, user_data.email):
+            raise ValueError("El email ya está registrado en el sistema")
+        
+        db_user = await AsyncUserService.create_user(db, user_data)
+        if db_user is None:
+            # Otro registro con el mismo email ganó la carrera
+            raise ValueError("El email ya está registrado en el sistema")
+        return db_user
+    
+    @staticmethod
+    async def bulk_create_users(
+        db: AsyncSession,
+        rows: List[Union[Dict[str, Any], str]],
+        batch_size: int = 1000,
+        imported_by: Optional[User] = None
+    ) -> UserImportResult:
+        """
+        Crear usuarios en lote (importación masiva)
+        
+        Por cada lote: una consulta descarta los emails ya registrados (sin
+        gastar bcrypt en ellos), las contraseñas restantes se hashean en
+        paralelo en el pool de hashing y las filas se insertan con un único
+        INSERT ... ON CONFLICT (email) DO NOTHING RETURNING ejecutado como
+        executemany (multi-row VALUES).
+        
+        Args:
+            db: Sesión asíncrona de base de datos
+            rows: Filas leídas (dict) o mensajes de error de lectura (str)
+            batch_size: Filas por lote de inserción
+            imported_by: Operador que importa (se registra en la bitácora de auditoría)
+            
+        Returns:
+            UserImportResult con el resultado de cada fila y el throughput
+        """
+        start = time.perf_counter()
+        results: List[Optional[UserImportRowResult]] = [None] * len(rows)
+        valid: List[Tuple[int, UserCreate]] = []
+        seen_emails = set()
+        
+        # 1. Validar filas y descartar emails repetidos dentro del mismo archivo
+        for index, row in enumerate(rows):
+            if isinstance(row, str):
+                results[index] = UserImportRowResult(row=index, status="invalid", error=row)
+                continue
+            try:
+                user_data = UserCreate(**row)
+            except ValidationError as e:
+                results[index] = UserImportRowResult(
+                    row=index,
+                    email=str(row.get("email")) if row.get("email") is not None else None,
+                    status="invalid",
+                    error="; ".join(error["msg"] for error in e.errors())
+                )
+                continue
+            if user_data.email in seen_emails:
+                results[index] = UserImportRowResult(
+                    row=index, email=user_data.email, status="duplicate",
+                    error="Email repetido en el archivo"
+                )
+                continue
+            seen_emails.add(user_data.email)
+            valid.append((index, user_data))
+        
+        for offset in range(0, len(valid), batch_size):
+            batch = valid[offset:offset + batch_size]
+            
+            # 2. Señal barata de existencia antes de gastar bcrypt
+            existing = set((await db.execute(
+                select(User.email).where(User.email.in_([user.email for _, user in batch]))
+            )).scalars().all())
+            pending = []
+            for index, user_data in batch:
+                if user_data.email in existing:
+                    results[index] = UserImportRowResult(
+                        row=index, email=user_data.email, status="duplicate",
+                        error="El email ya está registrado"
+                    )
+                else:
+                    pending.append((index, user_data))
+            if not pending:
+                continue
+            
+            # 3. Hashear en paralelo usando todos los workers del pool
+            hashes = await hash_passwords_async([user.password for _, user in pending])
+            
+            # 4. Insertar el lote en un solo statement; los conflictos (carreras) se omiten
+            params = [
+                {"id": uuid.uuid4(), "email": user.email, "name": user.name, "password": hashed}
+                for (_, user), hashed in zip(pending, hashes)
+            ]
+            stmt = (
+                dialect_insert(db, User)
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(User.id, User.email)
+            )
+            created = {email: user_id for user_id, email in (await db.execute(stmt, params)).all()}
+            await db.commit()
+            user_search_index.upsert(
+                UserMatch(created[user.email], user.email, user.name)
+                for _, user in pending if user.email in created
+            )
+            
+            for index, user_data in pending:
+                if user_data.email in created:
+                    results[index] = UserImportRowResult(
+                        row=index, email=user_data.email, status="created",
+                        id=created[user_data.email]
+                    )
+                else:
+                    results[index] = UserImportRowResult(
+                        row=index, email=user_data.email, status="duplicate",
+                        error="El email ya está registrado"
+                    )
+        
+        elapsed = time.perf_counter() - start
+        result = UserImportResult(
+            total=len(rows),
+            created=sum(1 for result in results if result.status == "created"),
+            duplicates=sum(1 for result in results if result.status == "duplicate"),
+            invalid=sum(1 for result in results if result.status == "invalid"),
+            elapsed_seconds=round(elapsed, 4),
+            rows_per_second=round(len(rows) / elapsed, 2) if elapsed > 0 else 0.0,
+            results=results
+        )
+        audit_logger.record(
+            USERS_IMPORTED,
+            user_id=imported_by.id if imported_by else None,
+            email=imported_by.email if imported_by else None,
+            details={"total": result.total, "created": result.created,
+                     "duplicates": result.duplicates, "invalid": result.invalid}
+        )
+        return result
@@ -0,0 +1,20 @@
+"""
+Configuración compartida de los tests
+
+Los tests corren contra una base de datos SQLite temporal. El entorno se
+configura aquí, antes de que los tests importen módulos de la aplicación
+(database.py lee DATABASE_URL al importarse).
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks._common import configure_environment, create_schema  # noqa: E402
+
+# audit_logger global apagado: test_audit_log.py usa sus propias instancias
+configure_environment(DB_POOL_PROFILE="test", BCRYPT_ROUNDS="4", AUDIT_LOG_ENABLED="false")
+create_schema()
@@ -0,0 +1,101 @@
+"""
+Bitácora de auditoría con escritura diferida (services/audit_log.py)
+
+El audit_logger global está apagado en los tests (conftest.py); cada test usa
+su propio AuditLogger contra la base de datos temporal.
+"""
+
+import asyncio
+import uuid
+
+from sqlalchemy import select
+
+
+def new_logger(batch_size: int = 3, max_queue: int = 100):
+    from services.audit_log import AuditLogger
+
+    return AuditLogger(batch_size=batch_size, flush_interval_seconds=0.05, max_queue=max_queue)
+
+
+def audit_rows(email: str):
+    from database import engine
+    from models import AuditLog
+
+    with engine.connect() as conn:
+        return conn.execute(
+            select(AuditLog.event, AuditLog.user_id, AuditLog.details).where(AuditLog.email == email)
+        ).all()
+
+
+def test_flusher_writes_events_in_batches():
+    from services.audit_log import LOGIN_SUCCEEDED
+
+    logger = new_logger(batch_size=3)
+    email = f"audit-{uuid.uuid4().hex[:8]}@example.com"
+    user_id = uuid.uuid4()
+
+    async def scenario():
+        logger.start()
+        for _ in range(3):
+            logger.record(LOGIN_SUCCEEDED, user_id=user_id, email=email)
+        # Lote completo: el flusher lo escribe sin esperar a stop()
+        for _ in range(100):
+            if logger.stats()["written"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        written_before_stop = logger.stats()["written"]
+        for _ in range(4):
+            logger.record(LOGIN_SUCCEEDED, user_id=user_id, email=email)
+        await logger.stop()
+        return written_before_stop
+
+    assert asyncio.run(scenario()) == 3
+    stats = logger.stats()
+    assert stats["written"] == 7 and stats["pending"] == 0 and stats["dropped"] == 0
+    assert stats["batches"] >= 3  # 3 + 3 + 1 con batch_size=3
+    rows = audit_rows(email)
+    assert len(rows) == 7
+    assert {(event, row_user_id) for event, row_user_id, _ in rows} == {(LOGIN_SUCCEEDED, user_id)}
+
+
+def test_full_queue_drops_and_stop_flushes_pending():
+    from services.audit_log import USER_DELETED
+
+    logger = new_logger(batch_size=10, max_queue=2)
+    email = f"audit-{uuid.uuid4().hex[:8]}@example.com"
+
+    # Sin flusher en marcha: la cola se llena y el resto se descarta sin bloquear
+    for _ in range(5):
+        logger.record(USER_DELETED, email=email)
+    assert logger.stats()["pending"] == 2 and logger.stats()["dropped"] == 3
+
+    asyncio.run(logger.stop())
+
+    assert logger.stats()["written"] == 2 and logger.stats()["pending"] == 0
+    assert len(audit_rows(email)) == 2
+
+
+def test_sync_user_service_records_from_worker_thread(monkeypatch):
+    import services.user_services as user_services
+    from database import get_session_factory
+    from services.audit_log import LOGIN_FAILED
+
+    logger = new_logger()
+    monkeypatch.setattr(user_services, "audit_logger", logger)
+    email = f"audit-{uuid.uuid4().hex[:8]}@example.com"
+
+    def login_in_threadpool():
+        # Como un endpoint síncrono de FastAPI: fuera del event loop del flusher
+        with get_session_factory()() as db:
+            assert user_services.UserService.authenticate_user(db, email, "abcd1234") is None
+
+    async def scenario():
+        logger.start()
+        await asyncio.to_thread(login_in_threadpool)
+        await logger.stop()
+
+    asyncio.run(scenario())
+
+    assert [(event, details) for event, _, details in audit_rows(email)] == [
+        (LOGIN_FAILED, '{"reason": "unknown_email"}')
+    ]
@@ -0,0 +1,72 @@
+"""
+Benchmark de carga (benchmarks/bench_load.py)
+
+Los escenarios se ejecutan contra la app en proceso (httpx.ASGITransport)
+con pocas requests, para que un cambio de la API que rompa el benchmark se
+detecte en pytest y no al medir. También se verifican los percentiles, el
+JSON guardado y la comparación entre corridas.
+"""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from benchmarks._common import percentile, run_concurrent, summarize
+from benchmarks.bench_load import SCENARIOS, build_scenarios, compare, register_accounts, save_results
+
+
+def test_percentile_and_summary():
+    latencies = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+
+    assert percentile(latencies, 50) == pytest.approx(0.050)
+    assert percentile(latencies, 99) == pytest.approx(0.099)
+    assert percentile([], 95) == 0.0
+    summary = summarize(latencies, elapsed=2.0)
+    assert summary["requests"] == 100 and summary["throughput_rps"] == 50.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
+
+
+def test_compare_reports_percent_deltas():
+    previous = {"results": {"login": {"c10": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 40.0, "throughput_rps": 100.0}}}}
+    current = {"results": {
+        "login": {"c10": {"p50_ms": 12.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_rps": 150.0}},
+        "me": {"c10": {"p50_ms": 1.0, "p95_ms": 1.0, "p99_ms": 1.0, "throughput_rps": 1.0}},
+    }}
+
+    assert compare(current, previous) == {
+        "login": {"c10": {"p50_ms": "+20.0%", "p95_ms": "+0.0%", "p99_ms": "-25.0%", "throughput_rps": "+50.0%"}}
+    }
+
+
+def test_save_results_writes_json(tmp_path):
+    report = {"metadata": {"commit": "abc1234"}, "results": {"me": {}}}
+    output = save_results(report, str(tmp_path / "run.json"))
+
+    with open(output, encoding="utf-8") as handle:
+        assert json.load(handle) == report
+
+
+def test_every_scenario_runs_against_the_app():
+    import httpx
+
+    from database import dispose_engines
+    from main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                run_id = uuid.uuid4().hex[:8]
+                accounts = await register_accounts(client, run_id, 2)
+                operations = build_scenarios(client, run_id, accounts, [account["id"] for account in accounts], level=2)
+                return {name: await run_concurrent(operations[name], 2, 2) for name in SCENARIOS}
+        finally:
+            await dispose_engines()
+
+    results = asyncio.run(run())
+
+    assert set(results) == set(SCENARIOS)
+    for summary in results.values():
+        assert summary["requests"] == 2 and summary["p99_ms"] >= summary["p50_ms"] > 0
@@ -0,0 +1,86 @@
+"""
+Pool de hashing acotado (utils/hashing.py)
+
+El slot de una tarea se libera cuando el worker termina, no cuando la
+corrutina que la espera se cancela (cliente desconectado): el trabajo real
+en curso debe seguir contando para el 503 de backpressure.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from utils.hashing import HashingExecutor, HashingQueueFullError
+
+
+def blocking(event: threading.Event) -> str:
+    event.wait(5)
+    return "hash"
+
+
+async def wait_for(predicate, timeout: float = 5.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+def test_cancelled_caller_keeps_slot_until_worker_finishes():
+    executor = HashingExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(executor.run(blocking, release))
+        await wait_for(lambda: executor.stats()["in_flight"] == 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # El bcrypt sigue en el worker: el pool sigue lleno
+        assert executor.stats()["in_flight"] == 1
+        with pytest.raises(HashingQueueFullError):
+            await executor.run(blocking, release)
+
+        release.set()
+        await wait_for(lambda: executor.stats()["in_flight"] == 0)
+        assert await executor.run(blocking, release) == "hash"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert (stats["completed"], stats["rejected"], stats["cancelled"]) == (2, 1, 0)
+
+
+def test_cancelled_queued_task_frees_its_slot():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(executor.run(blocking, release))
+        await wait_for(lambda: executor.stats()["in_flight"] == 1)
+        queued = asyncio.create_task(executor.run(blocking, release))
+        await wait_for(lambda: executor.stats()["queue_depth"] == 1)
+
+        # Todavía no empezó: se cancela en la cola y su slot queda libre
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert executor.stats()["queue_depth"] == 0
+
+        release.set()
+        assert await running == "hash"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert (stats["completed"], stats["cancelled"], stats["in_flight"]) == (1, 1, 0)
@@ -0,0 +1,74 @@
+"""
+Idempotency-Key (utils/idempotency.py)
+
+- Un reintento de POST /auth/register recibe el usuario original con un
+  token nuevo sin ejecutar SQL.
+- El LRU de InMemoryIdempotencyBackend nunca desaloja una clave en curso.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+@pytest.fixture(scope="module")
+def client():
+    from main import app
+
+    return TestClient(app)
+
+
+def test_register_replay_mints_token_without_queries(client):
+    from database import async_engine
+    from utils.auth import verify_token
+
+    body = {"email": f"idem-{uuid.uuid4().hex[:8]}@example.com", "name": "Idem", "password": "abcd1234"}
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/auth/register", json=body, headers=headers)
+    assert first.status_code == 201
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        replay = client.post("/auth/register", json=body, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert replay.status_code == 201
+    assert replay.headers["Idempotency-Replayed"] == "true"
+    assert statements == []
+    assert replay.json()["id"] == first.json()["id"]
+    payload = verify_token(replay.json()["access_token"])
+    assert payload["user_id"] == first.json()["id"]
+    assert payload["sub"] == body["email"]
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {replay.json()['access_token']}"}).status_code == 200
+
+
+def test_inflight_key_survives_lru_eviction():
+    from utils.idempotency import InMemoryIdempotencyBackend, StoredResponse
+
+    async def scenario():
+        backend = InMemoryIdempotencyBackend(max_keys=1, ttl_seconds=60)
+        assert await backend.claim("slow", "f-slow") is None
+
+        # Más respuestas guardadas que max_keys mientras "slow" sigue en curso
+        for key in ("a", "b", "c"):
+            assert await backend.claim(key, f"f-{key}") is None
+            await backend.complete(key, f"f-{key}", StoredResponse(201, b"{}", {}))
+
+        duplicate = await backend.claim("slow", "f-slow")
+        assert duplicate is not None and duplicate.response is None
+
+        waiter = asyncio.create_task(backend.wait("slow", timeout=1))
+        await backend.complete("slow", "f-slow", StoredResponse(201, b'{"ok": true}', {}))
+        record = await waiter
+        assert record.response.body == b'{"ok": true}'
+
+    asyncio.run(scenario())
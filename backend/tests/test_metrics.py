@@ -0,0 +1,49 @@
+"""
+Etiqueta `route` de las métricas por request (utils/metrics.py)
+
+Las rutas con path fijo (/users/batch, /users/import) comparten prefijo con
+/users/{user_id}; la etiqueta debe ser la de la ruta que atiende la request,
+no la primera cuyo path coincide.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def app():
+    from main import app
+
+    return app
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/users/batch", "/users/batch"),
+    ("POST", "/users/import", "/users/import"),
+    ("GET", "/users/search", "/users/search"),
+    ("GET", "/users/123e4567-e89b-12d3-a456-426614174000", "/users/{user_id}"),
+    ("PUT", "/users/123e4567-e89b-12d3-a456-426614174000", "/users/{user_id}"),
+    # Sin ninguna coincidencia completa: la ruta cuyo path coincide (405)
+    ("POST", "/users/123e4567-e89b-12d3-a456-426614174000", "/users/{user_id}"),
+    ("GET", "/no-existe", "<unmatched>"),
+])
+def test_route_template_prefers_full_match(app, method, path, expected):
+    from utils.metrics import _route_template
+
+    scope = {"type": "http", "method": method, "path": path, "root_path": "", "app": app}
+    assert _route_template(scope) == expected
+
+
+def test_metrics_label_batch_and_user_routes(app):
+    from utils.metrics import METRICS_ENABLED
+
+    if not METRICS_ENABLED:
+        pytest.skip("METRICS_ENABLED=false")
+    client = TestClient(app)
+    client.post("/users/batch", json={"ids": []})
+    client.get("/users/123e4567-e89b-12d3-a456-426614174000")
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="POST",route="/users/batch",status="401"}' in body
+    assert 'http_requests_total{method="GET",route="/users/{user_id}",status="401"}' in body
+    assert 'method="POST",route="/users/{user_id}"' not in body
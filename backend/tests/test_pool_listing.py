@@ -0,0 +1,77 @@
+"""
+PoolService.list_pools: cada página cuesta exactamente dos consultas
+
+Una con los pools y otra con sus organizadores (selectinload). Pool.organizer
+usa lazy="raise", así que una carga perezosa por fila (N+1) falla en lugar de
+pasar desapercibida.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert
+
+EXPECTED_QUERIES = 2
+POOL_COUNT = 5
+
+
+@pytest.fixture(scope="module")
+def organizer_ids():
+    """Inserta POOL_COUNT pools públicos, cada uno de un organizador distinto"""
+    from database import engine
+    from models import Pool, User
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    organizers = [uuid.uuid4() for _ in range(POOL_COUNT)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"listing{i}@example.com", "name": f"Organizador {i}", "password": "x"}
+            for i, user_id in enumerate(organizers)
+        ])
+        conn.execute(insert(Pool), [
+            {
+                "organizer_id": user_id,
+                "name": f"Pool {i}",
+                "status": "active",
+                "visibility": "public",
+                "target_amount": 1000,
+                "current_amount": 0,
+                "contributor_count": 0,
+                "created_at": base + timedelta(seconds=i),
+            }
+            for i, user_id in enumerate(organizers)
+        ])
+    return organizers
+
+
+async def list_page(limit: int):
+    """Lista una página y retorna (pools, organizadores, sentencias ejecutadas)"""
+    from database import AsyncSessionLocal, async_engine, dispose_engines
+    from services.pool_services import PoolService
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with AsyncSessionLocal() as db:
+            pools, _ = await PoolService.list_pools(db, visibility="public", limit=limit)
+            # Acceder al organizador no debe emitir consultas (lazy="raise")
+            organizers = {pool.organizer.id for pool in pools}
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+        await dispose_engines()
+    return pools, organizers, statements
+
+
+@pytest.mark.parametrize("limit", [1, POOL_COUNT])
+def test_list_pools_uses_two_queries_per_page(organizer_ids, limit):
+    pools, organizers, statements = asyncio.run(list_page(limit))
+
+    assert len(pools) == limit
+    assert organizers <= set(organizer_ids) and len(organizers) == limit
+    assert len(statements) == EXPECTED_QUERIES, statements
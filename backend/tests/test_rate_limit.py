@@ -0,0 +1,153 @@
+"""
+Rate limiting (utils/rate_limit.py)
+
+Token bucket en memoria, buckets por IP, email y usuario, y 429 con
+Retry-After en los endpoints. RateLimiter acepta cualquier RateLimitBackend:
+aquí un stand-in local que registra las claves y responde lo programado.
+"""
+
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from starlette.requests import Request
+
+from utils.rate_limit import (
+    InMemoryRateLimitBackend, RateLimit, RateLimiter, RateLimitBackend, RateLimitResult
+)
+
+
+class StandInBackend(RateLimitBackend):
+    """Backend de prueba: registra cada clave y rechaza las indicadas"""
+
+    def __init__(self, rejected=(), retry_after: float = 0.2):
+        self.keys = []
+        self.rejected = set(rejected)
+        self.retry_after = retry_after
+
+    async def hit(self, key: str, limit: RateLimit) -> RateLimitResult:
+        self.keys.append(key)
+        if key in self.rejected:
+            return RateLimitResult(False, 0, self.retry_after)
+        return RateLimitResult(True, limit.capacity - 1, 0.0)
+
+
+def make_request(client_ip: str = "198.51.100.1", forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers, "client": (client_ip, 1234)})
+
+
+def test_parse_limits():
+    assert RateLimit.parse("5/minute") == RateLimit(5, 60.0)
+    assert RateLimit.parse(" 10/Hours ") == RateLimit(10, 3600.0)
+    for value in ("5", "five/minute", "5/fortnight", "0/minute"):
+        with pytest.raises(ValueError):
+            RateLimit.parse(value)
+
+
+def test_token_bucket_rejects_then_refills():
+    backend = InMemoryRateLimitBackend()
+    limit = RateLimit(2, 60.0)  # Un token cada 30 s
+
+    assert backend._take("k", limit, now=0.0) == RateLimitResult(True, 1, 0.0)
+    assert backend._take("k", limit, now=0.0) == RateLimitResult(True, 0, 0.0)
+    rejected = backend._take("k", limit, now=10.0)
+    assert not rejected.allowed and rejected.retry_after == pytest.approx(20.0)
+    assert backend._take("k", limit, now=30.0).allowed
+    # Otra clave tiene su propio bucket
+    assert backend._take("otra", limit, now=30.0).allowed
+
+
+def test_lru_evicts_least_recently_used_bucket():
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    limit = RateLimit(1, 60.0)
+    backend._take("a", limit, now=0.0)
+    backend._take("b", limit, now=0.0)
+    backend._take("c", limit, now=0.0)
+
+    assert len(backend) == 2 and backend.evictions == 1
+    assert backend._take("a", limit, now=0.0).allowed  # "a" fue desalojada: bucket lleno de nuevo
+
+
+def test_limiter_uses_ip_email_and_user_buckets():
+    backend = StandInBackend()
+    limiter = RateLimiter(
+        backend, RateLimit(30, 60), RateLimit(5, 60), trust_forwarded_for=True,
+        user_limits={"import_users": RateLimit(1, 3600)},
+    )
+
+    asyncio.run(limiter.check(make_request(forwarded_for="203.0.113.7, 10.0.0.1"), "login", email=" Ana@Example.com "))
+    asyncio.run(limiter.check(make_request(), "import_users", user_id="u-1"))
+    asyncio.run(limiter.check(make_request(), "login", user_id="u-1"))  # Sin límite por usuario para login
+
+    assert backend.keys == [
+        "ip:login:203.0.113.7", "email:login:ana@example.com",
+        "ip:import_users:198.51.100.1", "user:import_users:u-1",
+        "ip:login:198.51.100.1",
+    ]
+
+
+def test_limiter_raises_429_with_retry_after():
+    from fastapi import HTTPException
+
+    backend = StandInBackend(rejected={"email:login:ana@example.com"}, retry_after=0.2)
+    limiter = RateLimiter(backend, RateLimit(30, 60), RateLimit(5, 60))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(limiter.check(make_request(), "login", email="ana@example.com"))
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "1"}  # Redondeado hacia arriba, mínimo 1 s
+
+    disabled = RateLimiter(backend, RateLimit(30, 60), RateLimit(5, 60), enabled=False)
+    asyncio.run(disabled.check(make_request(), "login", email="ana@example.com"))
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """rate_limiter global con buckets nuevos y límites pequeños"""
+    from utils.rate_limit import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "backend", InMemoryRateLimitBackend())
+    monkeypatch.setattr(rate_limiter, "enabled", True)
+    monkeypatch.setattr(rate_limiter, "email_limit", RateLimit(2, 60))
+    monkeypatch.setattr(rate_limiter, "user_limits", {"import_users": RateLimit(1, 3600)})
+    return rate_limiter
+
+
+@pytest.fixture(scope="module")
+def client():
+    from main import app
+
+    return TestClient(app)
+
+
+def test_login_returns_429_before_checking_credentials(limited, client):
+    body = {"email": f"limited-{uuid.uuid4().hex[:8]}@example.com", "password": "abcd1234"}
+
+    assert [client.post("/auth/login-json", json=body).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/auth/login-json", json=body)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_import_has_its_own_per_user_bucket(limited, client, monkeypatch):
+    from config import settings
+    from database import engine
+    from models import User
+    from utils.auth import create_access_token
+
+    user_id = uuid.uuid4()
+    email = f"importer-{user_id.hex[:8]}@example.com"
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id=user_id, email=email, name="Importador", password="x"))
+    monkeypatch.setattr(settings, "USER_IMPORT_OPERATORS", [email])
+    token = create_access_token(data={"sub": email, "user_id": str(user_id)}, expires_delta=timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    assert client.post("/users/import", content="[]", headers=headers).status_code == 200
+    response = client.post("/users/import", content="[]", headers=headers)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
@@ -0,0 +1,108 @@
+"""
+DELETE /users/{id} con movimientos en el ledger de pools
+
+transactions.user_id no se borra en cascada: un usuario con contribuciones
+en pools de otros recibe 409 y el ledger queda intacto. SQLite solo aplica
+llaves foráneas con PRAGMA foreign_keys=ON, que aquí se activa en cada
+conexión del engine asíncrono (el perfil "test" no reutiliza conexiones).
+"""
+
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, insert, select
+
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture
+def client():
+    from database import async_engine
+    from main import app
+
+    event.listen(async_engine.sync_engine, "connect", enable_foreign_keys)
+    try:
+        yield TestClient(app)
+    finally:
+        event.remove(async_engine.sync_engine, "connect", enable_foreign_keys)
+
+
+def seed_user(conn, name: str) -> uuid.UUID:
+    from models import User
+
+    user_id = uuid.uuid4()
+    conn.execute(insert(User).values(id=user_id, email=f"{name}-{user_id.hex[:8]}@example.com", name=name, password="x"))
+    return user_id
+
+
+def seed_contribution(conn, organizer_id: uuid.UUID, contributor_id: uuid.UUID) -> int:
+    """Pool de `organizer_id` con una contribución de `contributor_id`; retorna el ID del pool"""
+    from models import Pool, Transaction
+
+    pool_id = conn.execute(insert(Pool).values(
+        organizer_id=organizer_id, name="Regalo", target_amount=100, current_amount=10, contributor_count=1,
+    ).returning(Pool.id)).scalar_one()
+    conn.execute(insert(Transaction).values(
+        id=uuid.uuid4(), pool_id=pool_id, user_id=contributor_id,
+        transaction_type="contribution", amount=10, status="completed",
+    ))
+    return pool_id
+
+
+def auth_headers(conn, user_id: uuid.UUID) -> dict:
+    from models import User
+    from utils.auth import create_access_token
+
+    email = conn.execute(select(User.email).where(User.id == user_id)).scalar_one()
+    token = create_access_token(data={"sub": email, "user_id": str(user_id)}, expires_delta=timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def count(conn, model, **filters) -> int:
+    query = select(func.count()).select_from(model)
+    for name, value in filters.items():
+        query = query.where(getattr(model, name) == value)
+    return conn.execute(query).scalar_one()
+
+
+def test_delete_user_with_contributions_returns_409(client):
+    from database import engine
+    from models import Transaction, User
+
+    with engine.begin() as conn:
+        organizer_id = seed_user(conn, "Organizador")
+        contributor_id = seed_user(conn, "Contribuyente")
+        seed_contribution(conn, organizer_id, contributor_id)
+        headers = auth_headers(conn, contributor_id)
+
+    response = client.delete(f"/users/{contributor_id}", headers=headers)
+
+    assert response.status_code == 409
+    with engine.connect() as conn:
+        assert count(conn, User, id=contributor_id) == 1
+        assert count(conn, Transaction, user_id=contributor_id) == 1
+
+
+def test_delete_organizer_with_only_own_pools_succeeds(client):
+    from database import engine
+    from models import Pool, Transaction, User
+
+    with engine.begin() as conn:
+        organizer_id = seed_user(conn, "Organizador")
+        pool_id = seed_contribution(conn, organizer_id, organizer_id)
+        headers = auth_headers(conn, organizer_id)
+
+    response = client.delete(f"/users/{organizer_id}", headers=headers)
+
+    # Sus pools (y sus movimientos) se borran en cascada antes de verificar la llave
+    assert response.status_code == 204
+    with engine.connect() as conn:
+        assert count(conn, User, id=organizer_id) == 0
+        assert count(conn, Pool, id=pool_id) == 0
+        assert count(conn, Transaction, pool_id=pool_id) == 0
@@ -0,0 +1,106 @@
+"""
+Importación masiva de usuarios (POST /users/import, AsyncUserService.bulk_create_users)
+
+Conteo created / duplicate / invalid por fila y acceso restringido a los
+operadores de USER_IMPORT_OPERATORS.
+"""
+
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+
+def unique_email(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}@example.com"
+
+
+def seed_user(email: str) -> uuid.UUID:
+    from database import engine
+    from models import User
+
+    user_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id=user_id, email=email, name="Existente", password="x"))
+    return user_id
+
+
+def test_bulk_create_users_accounts_every_row(monkeypatch):
+    import services.user_services as user_services
+    from database import AsyncSessionLocal, dispose_engines, engine
+    from models import User
+    from services.audit_log import AuditLogger
+
+    logger = AuditLogger(batch_size=10, flush_interval_seconds=1, max_queue=10)
+    monkeypatch.setattr(user_services, "audit_logger", logger)
+
+    existing = unique_email("existente")
+    seed_user(existing)
+    new_a, new_b = unique_email("nuevo-a"), unique_email("nuevo-b")
+    rows = [
+        {"email": new_a, "name": "Nuevo A", "password": "abcd1234"},
+        {"email": existing, "name": "Ya registrado", "password": "abcd1234"},
+        {"email": new_a, "name": "Repetido", "password": "abcd1234"},
+        {"email": "no-es-email", "name": "Inválido", "password": "abcd1234"},
+        "Fila 5: JSON inválido",
+        {"email": new_b, "name": "Nuevo B", "password": "abcd1234"},
+    ]
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await user_services.AsyncUserService.bulk_create_users(db, rows, batch_size=1)
+        finally:
+            await dispose_engines()
+
+    result = asyncio.run(run())
+
+    assert (result.total, result.created, result.duplicates, result.invalid) == (6, 2, 2, 2)
+    assert [row.status for row in result.results] == [
+        "created", "duplicate", "duplicate", "invalid", "invalid", "created"
+    ]
+    assert result.results[4].error == "Fila 5: JSON inválido"
+    assert all(row.id is not None for row in result.results if row.status == "created")
+    with engine.connect() as conn:
+        assert conn.execute(
+            select(func.count()).select_from(User).where(User.email.in_([new_a, new_b]))
+        ).scalar_one() == 2
+    assert logger.stats()["pending"] == 1  # Un evento users_imported por importación
+
+
+@pytest.fixture(scope="module")
+def client():
+    from main import app
+
+    return TestClient(app)
+
+
+def auth_headers(email: str) -> dict:
+    from utils.auth import create_access_token
+
+    user_id = seed_user(email)
+    token = create_access_token(data={"sub": email, "user_id": str(user_id)}, expires_delta=timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+
+def test_import_requires_operator(monkeypatch, client):
+    from config import settings
+
+    operator = unique_email("operador")
+    monkeypatch.setattr(settings, "USER_IMPORT_OPERATORS", [operator])
+    body = f'[{{"email": "{unique_email("importado")}", "name": "Importado", "password": "abcd1234"}}]'
+
+    assert client.post("/users/import", content=body, headers=auth_headers(unique_email("normal"))).status_code == 403
+    response = client.post("/users/import", content=body, headers=auth_headers(operator))
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+
+
+def test_import_disabled_without_operators(monkeypatch, client):
+    from config import settings
+
+    monkeypatch.setattr(settings, "USER_IMPORT_OPERATORS", [])
+    assert client.post("/users/import", content="[]", headers=auth_headers(unique_email("normal"))).status_code == 403
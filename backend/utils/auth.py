@@ -1,14 +1,24 @@
-import bcrypt
+import hashlib
 from typing import Optional
 import jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 import os
 
+from utils.cache import TTLCache
+from utils.hashing import HashingQueueFullError, hashing_executor
+from utils.metrics import span
+
 # Configuración para JWT (con valores por defecto si no están en .env)
 SECRET_KEY = os.getenv("SECRET_KEY", "tu_clave_secreta_super_segura_aqui_cambiar_en_produccion")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Caché de tokens ya verificados (digest del token -> payload decodificado)
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "True").lower() == "true"
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 class PasswordManager:
     """Clase para manejar el hash y verificación de contraseñas con bcrypt"""
@@ -24,7 +34,9 @@ class PasswordManager:
         Returns:
             str: Hash bcrypt de la contraseña
         """
-        salt = bcrypt.gensalt()
+        import bcrypt  # Importación diferida: solo se necesita al hashear (arranque en frío)
+        
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
@@ -40,6 +52,8 @@ class PasswordManager:
         Returns:
             bool: True si la contraseña es correcta, False en caso contrario
         """
+        import bcrypt
+        
         try:
             return bcrypt.checkpw(
                 plain_password.encode('utf-8'), 
@@ -78,6 +92,9 @@ class TokenManager:
         """
         Verifica y decodifica un token JWT
         
+        Los tokens ya verificados se sirven desde token_cache hasta su `exp`,
+        evitando repetir la verificación HMAC en cada request.
+        
         Args:
             token (str): Token JWT a verificar
             
@@ -87,8 +104,17 @@ class TokenManager:
         Raises:
             HTTPException: Si el token es inválido o ha expirado
         """
+        cache_key = hashlib.sha256(token.encode('utf-8')).digest() if TOKEN_CACHE_ENABLED else None
+        if cache_key is not None:
+            cached = token_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+        
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            if cache_key is not None and "exp" in payload:
+                # La entrada expira junto con el token
+                token_cache.set(cache_key, dict(payload), expires_at=float(payload["exp"]))
             return payload
         except jwt.ExpiredSignatureError:
             raise HTTPException(
@@ -96,7 +122,7 @@ class TokenManager:
                 detail="Token ha expirado",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido",
@@ -124,3 +150,65 @@ def verify_token(token: str) -> dict:
     """Función de conveniencia para verificar tokens"""
     return token_manager.verify_token(token)
 
+def purge_token_cache() -> None:
+    """Vacía la caché de tokens verificados"""
+    token_cache.clear()
+
+def rotate_secret_key(new_secret_key: str) -> None:
+    """
+    Rota la clave de firma de JWT e invalida todos los tokens cacheados
+    
+    Args:
+        new_secret_key (str): Nueva clave secreta
+    """
+    global SECRET_KEY
+    SECRET_KEY = new_secret_key
+    purge_token_cache()
+
+def _hashing_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servicio de autenticación saturado, intenta de nuevo en unos segundos",
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hashea una contraseña en el pool de hashing sin bloquear el event loop
+    
+    Raises:
+        HTTPException: 503 si la cola del pool de hashing está llena
+    """
+    try:
+        # El span incluye la espera en la cola del pool (tiempo atribuible a bcrypt)
+        with span("bcrypt"):
+            return await hashing_executor.run(PasswordManager.hash_password, password)
+    except HashingQueueFullError:
+        raise _hashing_unavailable()
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hashea muchas contraseñas en paralelo usando todos los workers del pool
+    
+    A diferencia de hash_password_async, espera a que haya lugar en la cola
+    en lugar de responder 503 (pensado para importaciones masivas).
+    """
+    with span("bcrypt"):
+        return await hashing_executor.run_many(
+            PasswordManager.hash_password, [(password,) for password in passwords]
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifica una contraseña en el pool de hashing sin bloquear el event loop
+    
+    Raises:
+        HTTPException: 503 si la cola del pool de hashing está llena
+    """
+    try:
+        with span("bcrypt"):
+            return await hashing_executor.run(
+                PasswordManager.verify_password, plain_password, hashed_password
+            )
+    except HashingQueueFullError:
+        raise _hashing_unavailable()
@@ -0,0 +1,92 @@
+"""
+Lectura de archivos para la importación masiva de usuarios
+
+Convierte el cuerpo de la petición (arreglo JSON, NDJSON o CSV) en una lista
+de filas (dict). Las filas que no se pueden leer se representan con un
+mensaje de error para reportarlas individualmente en el resultado.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, List, Union
+
+# Fila leída (dict) o mensaje de error de lectura (str)
+ParsedRow = Union[Dict[str, Any], str]
+
+
+class ImportFormatError(ValueError):
+    """El archivo no se puede leer en el formato indicado"""
+
+
+def detect_format(content_type: str, filename: str = "") -> str:
+    """
+    Determina el formato a partir del Content-Type o la extensión del archivo
+    
+    Returns:
+        str: "json", "ndjson" o "csv"
+        
+    Raises:
+        ImportFormatError: Si el formato no está soportado
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    filename = (filename or "").lower()
+    if content_type in ("application/x-ndjson", "application/jsonl") or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if content_type in ("text/csv", "application/csv") or filename.endswith(".csv"):
+        return "csv"
+    if content_type == "application/json" or filename.endswith(".json"):
+        return "json"
+    raise ImportFormatError(
+        "Formato no soportado: usar application/json, application/x-ndjson o text/csv"
+    )
+
+
+def parse_rows(data: bytes, format: str) -> List[ParsedRow]:
+    """
+    Lee las filas del archivo
+    
+    Args:
+        data (bytes): Contenido del archivo
+        format (str): "json", "ndjson" o "csv"
+        
+    Returns:
+        List[ParsedRow]: Una entrada por fila, dict o mensaje de error
+        
+    Raises:
+        ImportFormatError: Si el archivo completo es ilegible
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("El archivo debe estar codificado en UTF-8")
+    
+    if format == "json":
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f"JSON inválido: {e}")
+        if not isinstance(rows, list):
+            raise ImportFormatError("Se esperaba un arreglo JSON de usuarios")
+        return [row if isinstance(row, dict) else "La fila debe ser un objeto JSON" for row in rows]
+    
+    if format == "ndjson":
+        rows: List[ParsedRow] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                rows.append(row if isinstance(row, dict) else "La fila debe ser un objeto JSON")
+            except json.JSONDecodeError as e:
+                rows.append(f"JSON inválido: {e}")
+        return rows
+    
+    if format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"email", "name", "password"} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFormatError(f"Faltan columnas en el CSV: {', '.join(sorted(missing))}")
+        return [dict(row) for row in reader]
+    
+    raise ImportFormatError(f"Formato no soportado: {format}")
@@ -0,0 +1,113 @@
+"""
+Caché en memoria acotada con expiración (TTL) y desalojo LRU
+
+Es segura para usar desde el event loop y desde threads (rutas síncronas
+que FastAPI ejecuta en el threadpool). Las operaciones son O(1).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Caché LRU con tamaño máximo y expiración por entrada"""
+    
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Args:
+            max_size (int): Número máximo de entradas (se desaloja la menos usada)
+            ttl_seconds (float): Tiempo de vida por defecto de cada entrada
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna el valor cacheado o None si no existe o expiró"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, deadline = entry
+            if deadline <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        expires_at: Optional[float] = None
+    ) -> None:
+        """
+        Guarda un valor en la caché
+        
+        Args:
+            key: Clave de la entrada
+            value: Valor a guardar
+            ttl_seconds (float, optional): TTL propio de la entrada
+            expires_at (float, optional): Expiración absoluta como timestamp UNIX;
+                la entrada vive hasta lo que ocurra primero entre esto y el TTL
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        deadline = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Elimina una entrada y retorna su valor (o None)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+    
+    def clear(self) -> None:
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key: Hashable) -> bool:
+        """Indica si la clave existe y no expiró (no afecta las estadísticas)"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de uso de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,71 @@
+"""
+Serialización de filas para exportaciones en streaming (NDJSON / CSV)
+
+Trabaja directamente sobre filas de SQLAlchemy (tuplas con nombre) sin
+construir modelos Pydantic por fila. Cada lote se convierte en un único
+bloque de bytes para minimizar los writes de la respuesta.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterable, Sequence
+from uuid import UUID
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def ndjson_chunk(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Serializa un lote de filas como NDJSON (un objeto JSON por línea)
+    
+    Args:
+        fields: Nombres de las columnas en el orden de las filas
+        rows: Filas del lote
+        
+    Returns:
+        bytes: Líneas NDJSON codificadas en UTF-8
+    """
+    lines = [
+        json.dumps(
+            {field: _to_json_value(value) for field, value in zip(fields, row)},
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def csv_header(fields: Sequence[str]) -> bytes:
+    """Línea de encabezado CSV"""
+    return _write_csv([fields])
+
+
+def csv_chunk(rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Serializa un lote de filas como CSV
+    
+    Args:
+        rows: Filas del lote
+        
+    Returns:
+        bytes: Líneas CSV codificadas en UTF-8
+    """
+    return _write_csv(
+        ["" if value is None else _to_json_value(value) for value in row]
+        for row in rows
+    )
+
+
+def _write_csv(rows: Iterable[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,203 @@
+"""
+Pool de workers para operaciones bcrypt
+
+bcrypt consume ~250 ms de CPU por operación. Ejecutarlo directamente en un
+endpoint `async def` bloquea el event loop y serializa toda la API. Este
+módulo ejecuta el hashing en un pool dedicado (threads por defecto, ya que
+bcrypt libera el GIL; opcionalmente procesos) con una cola acotada: cuando
+la cola está llena se rechaza la tarea en lugar de acumular latencia.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+
+
+class HashingQueueFullError(Exception):
+    """La cola del pool de hashing está llena (aplicar backpressure)"""
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Ejecuta fn en el worker y retorna (resultado, segundos de CPU en el worker)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingExecutor:
+    """Executor acotado para bcrypt con métricas de cola y latencia"""
+    
+    def __init__(self, max_workers: int, max_queue: int, kind: str = "thread"):
+        """
+        Args:
+            max_workers (int): Número de workers (threads o procesos)
+            max_queue (int): Tareas que pueden esperar cuando todos los workers están ocupados
+            kind (str): "thread" (por defecto) o "process"
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Tipo de executor no soportado: {kind}")
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        # Métricas
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._work_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._max_latency = 0.0
+    
+    @property
+    def capacity(self) -> int:
+        """Tareas admitidas simultáneamente (en ejecución + en cola)"""
+        return self.max_workers + self.max_queue
+    
+    def _get_executor(self) -> Executor:
+        # Se crea de forma perezosa para no heredar threads/procesos a través de un fork
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="bcrypt"
+                )
+        return self._executor
+    
+    def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise HashingQueueFullError(
+                    f"Cola de hashing llena ({self._pending}/{self.capacity})"
+                )
+            self._pending += 1
+            self._submitted += 1
+    
+    def _release_slot(self, work: float, total: float, ok: bool, cancelled: bool = False) -> None:
+        with self._lock:
+            self._pending -= 1
+            if ok:
+                self._completed += 1
+                self._work_seconds += work
+                self._wait_seconds += max(0.0, total - work)
+                self._max_latency = max(self._max_latency, total)
+            elif cancelled:
+                self._cancelled += 1
+            else:
+                self._failed += 1
+    
+    def _on_done(self, future: Future, start: float) -> None:
+        """Libera el slot cuando la tarea termina en el worker (o se cancela antes de empezar)"""
+        total = time.perf_counter() - start
+        if future.cancelled():
+            self._release_slot(0.0, total, ok=False, cancelled=True)
+        elif future.exception() is not None:
+            self._release_slot(0.0, total, ok=False)
+        else:
+            self._release_slot(future.result()[1], total, ok=True)
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta fn(*args) en el pool sin bloquear el event loop
+        
+        Args:
+            fn: Función a ejecutar (debe ser serializable si kind="process")
+            *args: Argumentos de la función
+            
+        Returns:
+            Any: Resultado de fn
+            
+        Raises:
+            HashingQueueFullError: Si el pool y su cola están llenos
+        """
+        self._acquire_slot()
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, *args)
+        except BaseException:
+            self._release_slot(0.0, time.perf_counter() - start, ok=False)
+            raise
+        # El slot se libera cuando el worker termina, no cuando deja de esperarse:
+        # si el cliente se desconecta (cancelación), el bcrypt en curso sigue
+        # ocupando el worker y debe seguir contando para el 503. Una tarea
+        # aún en cola sí se cancela y libera su slot de inmediato.
+        future.add_done_callback(lambda done: self._on_done(done, start))
+        result, _ = await asyncio.wrap_future(future)
+        return result
+    
+    async def run_many(
+        self,
+        fn: Callable[..., Any],
+        args_list: Iterable[Tuple[Any, ...]],
+        retry_delay: float = 0.05
+    ) -> List[Any]:
+        """
+        Ejecuta fn sobre muchos argumentos en paralelo (p. ej. importación masiva)
+        
+        Mantiene a lo sumo `max_workers` tareas en vuelo para no ocupar la cola
+        que usan los logins interactivos; si la cola está llena, espera y
+        reintenta en lugar de fallar.
+        
+        Args:
+            fn: Función a ejecutar
+            args_list: Tuplas de argumentos, una por llamada
+            retry_delay (float): Espera en segundos antes de reintentar con la cola llena
+            
+        Returns:
+            List[Any]: Resultados en el mismo orden que args_list
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def run_one(args: Tuple[Any, ...]) -> Any:
+            async with semaphore:
+                while True:
+                    try:
+                        return await self.run(fn, *args)
+                    except HashingQueueFullError:
+                        await asyncio.sleep(retry_delay)
+        
+        return await asyncio.gather(*(run_one(args) for args in args_list))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retorna una instantánea de las métricas del pool"""
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self._pending, self.max_workers),
+                "queue_depth": max(0, self._pending - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "avg_work_ms": round(self._work_seconds / completed * 1000, 3),
+                "avg_queue_wait_ms": round(self._wait_seconds / completed * 1000, 3),
+                "max_latency_ms": round(self._max_latency * 1000, 3),
+            }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool (se recrea en el siguiente uso)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Instancia global usada por utils.auth
+hashing_executor = HashingExecutor(
+    max_workers=settings.HASH_POOL_SIZE,
+    max_queue=settings.HASH_QUEUE_SIZE,
+    kind=settings.HASH_EXECUTOR
+)
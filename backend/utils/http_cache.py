@@ -0,0 +1,103 @@
+"""
+GET condicional (ETag / Last-Modified) para lecturas de usuarios
+
+El ETag débil de un usuario se deriva de su `id` y de `updated_at` (o
+`created_at` si nunca se actualizó), que BaseModel renueva en cada UPDATE con
+resolución de microsegundos. Comparar el ETag no requiere serializar el
+UserResponse: si el cliente ya tiene la versión actual se responde 304 sin
+cuerpo.
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite retorna datetimes sin zona horaria (se guardan en UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def last_modified(entity: Any) -> datetime:
+    """Fecha de la última modificación (updated_at o, si no hay, created_at) en UTC"""
+    return _as_utc(entity.updated_at or entity.created_at)
+
+
+def weak_etag(entity: Any) -> str:
+    """
+    ETag débil W/"<id>.<microsegundos de la última modificación>"
+
+    Args:
+        entity: Fila con id, created_at y updated_at (p. ej. User)
+    """
+    version = (last_modified(entity) - _EPOCH) // timedelta(microseconds=1)
+    entity_id = getattr(entity.id, "hex", entity.id)
+    return f'W/"{entity_id}.{version}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil (RFC 9110): se ignora el prefijo W/ de ambos lados"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Last-Modified tiene resolución de segundos
+    return modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, response: Response, entity: Any) -> Optional[Response]:
+    """
+    Agrega ETag, Last-Modified y Cache-Control a la respuesta y evalúa la precondición
+
+    If-None-Match tiene prioridad; If-Modified-Since solo se evalúa si no
+    viene If-None-Match. Las respuestas son `private, no-cache`: el cliente
+    puede guardarlas pero debe revalidarlas (pertenecen al usuario autenticado).
+
+    Args:
+        request (Request): Request en curso
+        response (Response): Respuesta del endpoint (recibe los headers)
+        entity: Fila con id, created_at y updated_at
+
+    Returns:
+        Response 304 sin cuerpo si el cliente ya tiene la versión actual, o
+        None si el endpoint debe responder normalmente
+    """
+    etag = weak_etag(entity)
+    modified = last_modified(entity)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, modified)
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -0,0 +1,342 @@
+"""
+Idempotency-Key para los POST que crean usuarios (registro y alta)
+
+Los clientes móviles reintentan POST /auth/register y POST /users/ cuando
+vence su timeout. Sin idempotencia cada reintento repite la consulta del
+email y un hash bcrypt completo antes de fallar como duplicado. Con el header
+`Idempotency-Key`:
+
+- La primera request con la clave la "reclama" (marca en curso) y, al
+  terminar, se guarda su respuesta (2xx o 4xx).
+- Un reintento con la misma clave y el mismo cuerpo recibe la respuesta
+  guardada sin tocar la base de datos ni bcrypt (header Idempotency-Replayed).
+- Un duplicado concurrente espera a que termine la primera request en lugar
+  de competir con ella (hasta IDEMPOTENCY_WAIT_SECONDS; después, 409).
+- La misma clave con otro cuerpo responde 422.
+- Si la request original falla con 5xx o 429, la clave se libera y el
+  siguiente intento se ejecuta de nuevo.
+- Una ruta puede guardar solo la parte estable de su respuesta y completarla
+  en cada reintento (`refresh`, sin I/O): el registro guarda el usuario y
+  emite un token nuevo, en lugar de reenviar uno que ya pudo haber expirado.
+
+Las claves se acotan por ruta. El cuerpo se identifica con un HMAC (clave
+SECRET_KEY) para no guardar contraseñas. El backend es intercambiable:
+InMemoryIdempotencyBackend (por proceso, TTL+LRU) es el default; un backend
+compartido entre workers solo necesita implementar IdempotencyBackend.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from config import settings
+from utils.cache import TTLCache
+from utils.metrics import Counter
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotency-Replayed"
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests con Idempotency-Key por ruta y resultado",
+    ("route", "outcome"),
+)
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: bytes
+    headers: Dict[str, str]
+
+
+class IdempotencyRecord(NamedTuple):
+    fingerprint: str
+    response: Optional[StoredResponse]  # None mientras la request original está en curso
+
+
+# Recibe la respuesta guardada y retorna la que se reenvía, o None si ya no aplica
+ReplayRefresher = Callable[[StoredResponse], Awaitable[Optional[StoredResponse]]]
+
+
+class IdempotencyBackend(ABC):
+    """Almacenamiento de las claves (en memoria, Redis, etc.)"""
+
+    @abstractmethod
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """
+        Reclama la clave si nadie la tiene (de forma atómica)
+
+        Returns:
+            None si la clave quedó reclamada por el llamador; si no, el
+            registro existente (en curso o con su respuesta)
+        """
+
+    @abstractmethod
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        """Guarda la respuesta de la request que reclamó la clave y despierta a los que esperan"""
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Libera una clave, en curso o con respuesta, sin guardar nada (el próximo intento se ejecuta)"""
+
+    @abstractmethod
+    async def wait(self, key: str, timeout: float) -> Optional[IdempotencyRecord]:
+        """
+        Espera a que termine la request en curso con la clave
+
+        Returns:
+            El registro con su respuesta, o None si la clave se liberó
+
+        Raises:
+            asyncio.TimeoutError: Si la request original no terminó a tiempo
+        """
+
+
+class InMemoryIdempotencyBackend(IdempotencyBackend):
+    """
+    Claves en memoria del proceso (TTL+LRU acotado)
+
+    Solo las respuestas guardadas viven en el TTLCache. Las claves en curso
+    van aparte, con un future del event loop cada una: así el LRU nunca
+    desaloja una clave en curso (un segundo claim la reemplazaría y quienes
+    esperan a la primera request recibirían 409). Están acotadas por las
+    requests concurrentes. Con varios workers, un reintento atendido por otro
+    worker no ve la clave: usar un backend compartido si se necesita
+    idempotencia global.
+    """
+
+    def __init__(self, max_keys: int, ttl_seconds: float):
+        """
+        Args:
+            max_keys (int): Respuestas guardadas como máximo (se desaloja la menos usada)
+            ttl_seconds (float): Tiempo que se conserva cada respuesta
+        """
+        self._records = TTLCache(max_size=max_keys, ttl_seconds=ttl_seconds)
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        # Sin await entre la lectura y la escritura: atómico dentro del event loop
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return IdempotencyRecord(inflight[0], None)
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        self._inflight[key] = (fingerprint, asyncio.get_running_loop().create_future())
+        return None
+
+    def _resolve(self, key: str, record: Optional[IdempotencyRecord]) -> None:
+        inflight = self._inflight.pop(key, None)
+        if inflight is not None and not inflight[1].done():
+            inflight[1].set_result(record)
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        record = IdempotencyRecord(fingerprint, response)
+        self._records.set(key, record)
+        self._resolve(key, record)
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key)
+        self._resolve(key, None)
+
+    async def wait(self, key: str, timeout: float) -> Optional[IdempotencyRecord]:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            return self._records.get(key)
+        return await asyncio.wait_for(asyncio.shield(inflight[1]), timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._inflight), **self._records.stats()}
+
+
+def _to_json(content: Any) -> Any:
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json")
+    return jsonable_encoder(content)
+
+
+def _replay(stored: StoredResponse) -> Response:
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        headers={**stored.headers, REPLAYED_HEADER: "true"},
+        media_type="application/json",
+    )
+
+
+class IdempotencyScope:
+    """
+    Una request de una ruta idempotente (ver IdempotencyStore.scope)
+
+    Si `replay` no es None el endpoint debe retornarlo sin hacer nada más. Si
+    no, construye su resultado y lo retorna con respond(); las HTTPException
+    4xx que lance dentro del scope también se guardan.
+    """
+
+    def __init__(
+        self,
+        store: "IdempotencyStore",
+        route: str,
+        key: Optional[str],
+        fingerprint: Optional[str],
+        refresh: Optional[ReplayRefresher] = None
+    ):
+        self.store = store
+        self.route = route
+        self.key = key
+        self.fingerprint = fingerprint
+        self.refresh = refresh
+        self.replay: Optional[Response] = None
+        self._claimed = False
+
+    async def __aenter__(self) -> "IdempotencyScope":
+        if self.key is None:
+            return self
+        backend = self.store.backend
+        while True:
+            record = await backend.claim(self.key, self.fingerprint)
+            if record is None:
+                self._claimed = True
+                IDEMPOTENCY_REQUESTS.inc((self.route, "executed"))
+                return self
+            if record.fingerprint != self.fingerprint:
+                IDEMPOTENCY_REQUESTS.inc((self.route, "mismatch"))
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"{IDEMPOTENCY_HEADER} ya se usó con otro cuerpo",
+                )
+            if record.response is None:
+                # Duplicado concurrente: esperar a la request original
+                try:
+                    record = await backend.wait(self.key, self.store.wait_seconds)
+                except asyncio.TimeoutError:
+                    IDEMPOTENCY_REQUESTS.inc((self.route, "conflict"))
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Hay una request en curso con el mismo {IDEMPOTENCY_HEADER}",
+                        headers={"Retry-After": "1"},
+                    )
+                if record is None or record.response is None:
+                    continue  # La original falló y liberó la clave: reclamarla de nuevo
+            stored = record.response
+            if self.refresh is not None:
+                stored = await self.refresh(stored)
+                if stored is None:
+                    # El resultado guardado ya no aplica (p. ej. el usuario se eliminó)
+                    IDEMPOTENCY_REQUESTS.inc((self.route, "stale"))
+                    await backend.release(self.key)
+                    continue
+            IDEMPOTENCY_REQUESTS.inc((self.route, "replayed"))
+            self.replay = _replay(stored)
+            return self
+
+    async def respond(self, content: Any, status_code: int = status.HTTP_200_OK, stored: Any = None) -> Response:
+        """
+        Serializa el resultado del endpoint y, si la request reclamó una clave, lo guarda
+
+        Args:
+            content: Modelo Pydantic (o datos serializables a JSON) de la respuesta
+            status_code (int): Código de la respuesta
+            stored (optional): Lo que se guarda para los reintentos si difiere de
+                `content` (p. ej. sin el token, que el refresh del scope vuelve a emitir)
+        """
+        response = JSONResponse(content=_to_json(content), status_code=status_code)
+        if self._claimed:
+            body = bytes(response.body) if stored is None else bytes(JSONResponse(_to_json(stored)).body)
+            await self._store(StoredResponse(status_code, body, {}))
+        return response
+
+    async def _store(self, stored: StoredResponse) -> None:
+        self._claimed = False
+        await self.store.backend.complete(self.key, self.fingerprint, stored)
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if not self._claimed:
+            return
+        if (
+            isinstance(exc, HTTPException)
+            and exc.status_code < 500
+            and exc.status_code != status.HTTP_429_TOO_MANY_REQUESTS
+        ):
+            # Resultado definitivo (p. ej. 400 email ya registrado): el reintento recibe el mismo error
+            body = json.dumps({"detail": exc.detail}).encode()
+            await self._store(StoredResponse(exc.status_code, body, dict(exc.headers or {})))
+            return
+        # 5xx, 429, errores inesperados o sin respond(): el próximo intento se ejecuta
+        self._claimed = False
+        await self.store.backend.release(self.key)
+
+
+class IdempotencyStore:
+    """Aplica Idempotency-Key a las rutas que crean recursos"""
+
+    def __init__(self, backend: IdempotencyBackend, wait_seconds: float, enabled: bool = True):
+        """
+        Args:
+            backend (IdempotencyBackend): Almacenamiento de las claves
+            wait_seconds (float): Espera máxima de un duplicado concurrente antes del 409
+            enabled (bool): Si es False, el header se ignora
+        """
+        self.backend = backend
+        self.wait_seconds = wait_seconds
+        self.enabled = enabled
+
+    @staticmethod
+    def fingerprint(route: str, payload: Any) -> str:
+        """HMAC del cuerpo de la request (no guarda el cuerpo, que puede traer contraseñas)"""
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump(mode="json")
+        data = json.dumps([route, jsonable_encoder(payload)], sort_keys=True, separators=(",", ":"))
+        return hmac.new(settings.SECRET_KEY.encode(), data.encode(), hashlib.sha256).hexdigest()
+
+    def scope(
+        self,
+        request: Request,
+        route: str,
+        payload: Any,
+        refresh: Optional[ReplayRefresher] = None
+    ) -> IdempotencyScope:
+        """
+        Scope idempotente de una request (`async with`)
+
+        Args:
+            request (Request): Request en curso (de ella se lee Idempotency-Key)
+            route (str): Nombre de la ruta ("register", "create_user", ...)
+            payload: Cuerpo validado de la request
+            refresh (callable, optional): Completa la respuesta guardada antes de
+                reenviarla; si retorna None la clave se descarta y la request se
+                ejecuta de nuevo
+
+        Raises:
+            HTTPException: 400 si la clave está vacía o es demasiado larga
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER) if self.enabled else None
+        if key is None:
+            return IdempotencyScope(self, route, None, None)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{IDEMPOTENCY_HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres",
+            )
+        return IdempotencyScope(self, route, f"{route}:{key}", self.fingerprint(route, payload), refresh)
+
+
+# Instancia global usada por routers.auth y routers.users
+idempotency_store = IdempotencyStore(
+    backend=InMemoryIdempotencyBackend(
+        max_keys=settings.IDEMPOTENCY_MAX_KEYS,
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    ),
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    enabled=settings.IDEMPOTENCY_ENABLED,
+)
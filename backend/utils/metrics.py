@@ -0,0 +1,344 @@
+"""
+Métricas de la API en formato de texto de Prometheus
+
+Registra por ruta (plantilla de la ruta, no la URL, para acotar la
+cardinalidad) la latencia, las requests en vuelo y, por request, el número
+de consultas SQL y el tiempo en la base de datos y en bcrypt. Así se puede
+distinguir si un endpoint lento (p. ej. /auth/login-json) espera a la base
+de datos o al pool de hashing.
+
+Con METRICS_ENABLED=false no se instala el middleware ni los listeners de
+SQLAlchemy, y span() retorna un context manager vacío.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+
+from config import settings
+
+METRICS_ENABLED = settings.METRICS_ENABLED
+
+# Buckets de latencia en segundos (1 ms a 10 s)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Etiqueta para requests que no coinciden con ninguna ruta (evita una serie por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+# Métricas registradas, en orden de creación (las de otros módulos se agregan al crearse)
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Familia de métricas con etiquetas (una serie por combinación de valores)"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por serie: [conteos por bucket (+ el de +Inf), suma]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = self._header()
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+ROUTE_LABELS = ("method", "route")
+
+REQUESTS_TOTAL = Counter("http_requests_total", "Requests atendidas por ruta y código de estado", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests en curso por ruta", ROUTE_LABELS)
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Latencia de las requests por ruta", ROUTE_LABELS)
+REQUEST_DB_QUERIES = Counter("http_request_db_queries_total", "Consultas SQL ejecutadas por las requests de cada ruta", ROUTE_LABELS)
+REQUEST_DB_DURATION = Histogram("http_request_db_duration_seconds", "Tiempo en la base de datos por request", ROUTE_LABELS)
+REQUEST_SPAN_DURATION = Histogram("http_request_span_duration_seconds", "Tiempo por request en operaciones instrumentadas (p. ej. bcrypt)", ROUTE_LABELS + ("span",))
+DB_QUERIES_TOTAL = Counter("db_queries_total", "Consultas SQL ejecutadas (incluye tareas en segundo plano)", ("engine",))
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Duración de cada consulta SQL", ("engine",))
+SPAN_DURATION = Histogram("span_duration_seconds", "Duración de cada operación instrumentada", ("span",))
+
+
+
+class RequestTimings:
+    """Tiempos acumulados durante una request (consultas SQL y spans)"""
+
+    __slots__ = ("db_queries", "db_seconds", "spans")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans: Dict[str, float] = {}
+
+
+# Tiempos de la request en curso (None fuera de una request o con métricas desactivadas)
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def _timed_span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_DURATION.observe((name,), elapsed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.spans[name] = timings.spans.get(name, 0.0) + elapsed
+
+
+def span(name: str):
+    """
+    Mide un bloque como operación con nombre (p. ej. "bcrypt")
+
+    Uso: `with span("bcrypt"): ...`. El tiempo se suma a la request en curso
+    y al histograma global span_duration_seconds.
+
+    Args:
+        name (str): Nombre de la operación
+    """
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return _timed_span(name)
+
+
+def instrument_sql(name: str, engine: Any) -> None:
+    """
+    Registra los listeners que cuentan y miden las consultas SQL de un engine
+
+    Args:
+        name (str): Nombre con el que se reportan las métricas ("sync", "async", ...)
+        engine: Engine síncrono (para AsyncEngine usar .sync_engine)
+    """
+    if not METRICS_ENABLED:
+        return
+
+    labels = (name,)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERIES_TOTAL.inc(labels)
+        DB_QUERY_DURATION.observe(labels, elapsed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.db_queries += 1
+            timings.db_seconds += elapsed
+
+    def handle_error(exception_context):
+        # La consulta falló: descartar su marca de inicio
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+def _route_template(scope: dict) -> str:
+    """
+    Plantilla de la ruta que atenderá la request (p. ej. /users/{user_id})
+
+    Igual que el router de Starlette: gana la primera ruta con Match.FULL; un
+    Match.PARTIAL (coincide el path pero no el método, como POST /users/batch
+    contra GET /users/{user_id}) solo cuenta si ninguna coincide por completo.
+    """
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    if partial is not None:
+        return getattr(partial, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+def _server_timing(timings: RequestTimings, total: float) -> str:
+    entries = [f"app;dur={total * 1000:.2f}", f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.db_queries} queries"']
+    entries.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.spans.items())
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia, requests en vuelo y tiempos por request
+
+    Args:
+        app: Aplicación ASGI envuelta
+        server_timing (bool): Agregar el header Server-Timing (db, bcrypt, app) a las respuestas
+    """
+
+    def __init__(self, app: Any, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        labels = (method, _route_template(scope))
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        status = "500"
+        start = time.perf_counter()
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", _server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(labels)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_timings.reset(token)
+            REQUESTS_IN_FLIGHT.dec(labels)
+            REQUESTS_TOTAL.inc(labels + (status,))
+            REQUEST_DURATION.observe(labels, elapsed)
+            REQUEST_DB_QUERIES.inc(labels, timings.db_queries)
+            REQUEST_DB_DURATION.observe(labels, timings.db_seconds)
+            for name, seconds in timings.spans.items():
+                REQUEST_SPAN_DURATION.observe(labels + (name,), seconds)
+
+
+def _render_gauges(prefix: str, label: str, stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Convierte estadísticas numéricas {serie: {campo: valor}} en gauges"""
+    gauges: Dict[str, List[str]] = {}
+    for series, values in stats.items():
+        for field, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{prefix}_{field}"
+            gauges.setdefault(name, [f"# TYPE {name} gauge"]).append(
+                f'{name}{{{label}="{_escape(series)}"}} {_format_value(value)}'
+            )
+    return [line for lines in gauges.values() for line in lines]
+
+
+def render_metrics(
+    pool_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+    hashing_stats: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Genera la exposición en formato de texto de Prometheus
+
+    Args:
+        pool_stats (dict, optional): Estado de los pools (database.get_pool_stats()["engines"])
+        hashing_stats (dict, optional): Estado del pool de bcrypt (hashing_executor.stats())
+
+    Returns:
+        str: Métricas en formato text/plain; version=0.0.4
+    """
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    if pool_stats:
+        lines.extend(_render_gauges("db_pool", "engine", pool_stats))
+    if hashing_stats:
+        lines.extend(_render_gauges("hashing", "executor", {hashing_stats.get("kind", "thread"): hashing_stats}))
+    return "\n".join(lines) + "\n"
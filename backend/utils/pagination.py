@@ -0,0 +1,50 @@
+"""
+Cursores opacos para paginación por keyset
+
+El cursor codifica la clave de orden (created_at, id) de la última fila de
+la página en base64 url-safe. El cliente solo lo reenvía tal cual.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Tuple, Union
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no tiene un formato válido"""
+
+
+def encode_cursor(created_at: datetime, row_id: Union[UUID, int]) -> str:
+    """
+    Codifica la posición (created_at, id) como cursor opaco
+    
+    Args:
+        created_at (datetime): Fecha de creación de la última fila
+        row_id (UUID | int): ID de la última fila
+        
+    Returns:
+        str: Cursor base64 url-safe sin padding
+    """
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: Callable[[str], Union[UUID, int]] = UUID) -> Tuple[datetime, Union[UUID, int]]:
+    """
+    Decodifica un cursor generado por encode_cursor
+    
+    Args:
+        cursor (str): Cursor opaco
+        id_type: Tipo del ID de la tabla (UUID por defecto, int para pools)
+        
+    Raises:
+        InvalidCursorError: Si el cursor está mal formado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), id_type(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError("Cursor de paginación inválido") from e
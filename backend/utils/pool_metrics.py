@@ -0,0 +1,152 @@
+"""
+Métricas de los pools de conexiones de SQLAlchemy
+
+Registra, por engine, el tiempo de espera al obtener una conexión del pool
+(checkout), las conexiones en uso y la tasa de creación de conexiones
+nuevas. Las clases Instrumented* se usan como `poolclass` al crear los
+engines en database.py.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+
+class PoolMetrics:
+    """Contadores de un pool de conexiones"""
+    
+    # Ventana para calcular la tasa de conexiones creadas
+    RATE_WINDOW_SECONDS = 60.0
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checked_out = 0
+        self.connections_created = 0
+        self._created_at: Deque[float] = deque()
+    
+    def record_checkout_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+    
+    def record_connect(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.connections_created += 1
+            self._created_at.append(now)
+            self._trim(now)
+    
+    def record_checked_out(self, delta: int) -> None:
+        with self._lock:
+            self.checked_out += delta
+    
+    def _trim(self, now: float) -> None:
+        while self._created_at and now - self._created_at[0] > self.RATE_WINDOW_SECONDS:
+            self._created_at.popleft()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._trim(time.monotonic())
+            checkouts = self.checkouts or 1
+            return {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / checkouts * 1000, 3),
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "in_use": self.checked_out,
+                "connections_created": self.connections_created,
+                "connections_created_last_minute": len(self._created_at),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Mide el tiempo que tarda el pool en entregar una conexión"""
+    
+    metrics: PoolMetrics
+    
+    def _do_get(self):  # type: ignore[override]
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics = getattr(self, "metrics", None)
+            if metrics is not None:
+                metrics.record_checkout_wait(time.perf_counter() - start)
+    
+    def recreate(self):  # type: ignore[override]
+        # engine.dispose() recrea el pool: conservar las métricas acumuladas
+        new_pool = super().recreate()
+        new_pool.metrics = getattr(self, "metrics", None)
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    pass
+
+
+# Métricas registradas por nombre de engine
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(name: str, engine: Any) -> PoolMetrics:
+    """
+    Registra los listeners de métricas en el pool de un engine
+    
+    Args:
+        name (str): Nombre con el que se reportan las métricas ("sync", "async", ...)
+        engine: Engine síncrono (para AsyncEngine usar .sync_engine)
+        
+    Returns:
+        PoolMetrics: Métricas asociadas al engine
+    """
+    metrics = PoolMetrics(name)
+    engine.pool.metrics = metrics
+    
+    event.listen(engine, "connect", lambda *args: metrics.record_connect())
+    event.listen(engine, "checkout", lambda *args: metrics.record_checked_out(1))
+    event.listen(engine, "checkin", lambda *args: metrics.record_checked_out(-1))
+    
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def get_pool_stats(engines: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna el estado de los pools de los engines indicados
+    
+    Args:
+        engines (dict): Nombre -> engine síncrono
+        
+    Returns:
+        dict: Métricas y estado (pool.status()) por engine
+    """
+    stats = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        entry = {"pool_class": type(pool).__name__, "status": pool.status()}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        if name in pool_metrics:
+            entry.update(pool_metrics[name].snapshot())
+        stats[name] = entry
+    return stats
@@ -0,0 +1,225 @@
+"""
+Rate limiting para los endpoints que ejecutan bcrypt (login, registro e importación)
+
+Cada intento consume un token de dos buckets: uno por IP y ruta, y otro por
+email y ruta. Con cualquiera de los dos vacío la request se rechaza con 429
+antes de tocar la base de datos o el pool de hashing, de modo que un ataque
+de credential stuffing no puede ocupar todos los cores con bcrypt. Las rutas
+de usuarios autenticados con un límite propio (`user_limits`, p. ej. la
+importación masiva, que hashea miles de contraseñas por request) consumen
+además un bucket por usuario.
+
+El backend es intercambiable: InMemoryRateLimitBackend (por proceso, O(1) y
+con memoria acotada) es el default; un backend compartido (p. ej. Redis)
+solo necesita implementar RateLimitBackend.hit.
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+
+from config import settings
+from utils.metrics import Counter
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimit(NamedTuple):
+    """Límite de token bucket: `capacity` intentos, recargados en `period_seconds`"""
+
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """
+        Convierte "5/minute" (o second, hour, day) en un RateLimit
+
+        Raises:
+            ValueError: Si el formato no es válido
+        """
+        try:
+            amount, period = value.strip().lower().split("/")
+            limit = cls(int(amount), float(_PERIODS[period.rstrip("s")]))
+        except (KeyError, ValueError):
+            raise ValueError(f"Límite inválido: {value!r} (formato: <n>/second|minute|hour|day)")
+        if limit.capacity < 1:
+            raise ValueError(f"Límite inválido: {value!r} (debe permitir al menos 1 intento)")
+        return limit
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float  # Segundos hasta el próximo intento permitido (0 si se permitió)
+
+
+class RateLimitBackend(ABC):
+    """Almacenamiento de los buckets (en memoria, Redis, etc.)"""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: RateLimit) -> RateLimitResult:
+        """
+        Consume un token del bucket `key`
+
+        Args:
+            key (str): Identificador del bucket (p. ej. "ip:login:203.0.113.7")
+            limit (RateLimit): Capacidad y velocidad de recarga del bucket
+
+        Returns:
+            RateLimitResult: Si se permitió el intento y cuánto esperar si no
+        """
+
+    async def reset(self) -> None:
+        """Vacía todos los buckets (uso en tests)"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets en memoria del proceso, O(1) por intento
+
+    Se guardan a lo sumo `max_keys` buckets; al llenarse se desaloja el menos
+    usado recientemente (ese cliente vuelve a empezar con el bucket lleno).
+    Con varios workers cada uno limita por separado: usar un backend
+    compartido si se necesita un límite global.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max(1, max_keys)
+        # key -> [tokens disponibles, instante de la última recarga]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _take(self, key: str, limit: RateLimit, now: float) -> RateLimitResult:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+                bucket = self._buckets[key] = [float(limit.capacity), now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_per_second)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return RateLimitResult(True, int(bucket[0]), 0.0)
+            return RateLimitResult(False, 0, (1 - bucket[0]) / limit.refill_per_second)
+
+    async def hit(self, key: str, limit: RateLimit) -> RateLimitResult:
+        return self._take(key, limit, time.monotonic())
+
+    async def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Intentos rechazados por rate limiting", ("route", "scope")
+)
+
+
+class RateLimiter:
+    """Aplica los límites por IP y por email de cada ruta protegida"""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_limit: RateLimit,
+        email_limit: RateLimit,
+        enabled: bool = True,
+        trust_forwarded_for: bool = False,
+        user_limits: Optional[Dict[str, RateLimit]] = None
+    ):
+        """
+        Args:
+            backend (RateLimitBackend): Almacenamiento de los buckets
+            ip_limit (RateLimit): Intentos por IP y ruta
+            email_limit (RateLimit): Intentos por email y ruta
+            enabled (bool): Si es False, check() no hace nada
+            trust_forwarded_for (bool): Tomar la IP del cliente de X-Forwarded-For
+                (solo detrás de un proxy confiable, p. ej. Vercel)
+            user_limits (dict, optional): Intentos por usuario de cada ruta que lo indique
+        """
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.user_limits = dict(user_limits or {})
+        self.enabled = enabled
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def client_ip(self, request: Request) -> str:
+        """IP del cliente (primer salto de X-Forwarded-For si el proxy es confiable)"""
+        if self.trust_forwarded_for:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    async def check(
+        self,
+        request: Request,
+        route: str,
+        email: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> None:
+        """
+        Consume un intento de la ruta para la IP del cliente y, si se indica, el email
+
+        Debe llamarse antes de cualquier consulta o hash.
+
+        Args:
+            request (Request): Request en curso (para obtener la IP)
+            route (str): Nombre de la ruta protegida ("login", "register", ...)
+            email (str, optional): Email del intento
+            user_id (str, optional): Usuario autenticado (bucket propio si la
+                ruta está en user_limits)
+
+        Raises:
+            HTTPException: 429 con Retry-After si se excedió algún límite
+        """
+        if not self.enabled:
+            return
+
+        buckets: Dict[str, tuple] = {"ip": (f"ip:{route}:{self.client_ip(request)}", self.ip_limit)}
+        if email:
+            buckets["email"] = (f"email:{route}:{email.strip().lower()}", self.email_limit)
+        if user_id and route in self.user_limits:
+            buckets["user"] = (f"user:{route}:{user_id}", self.user_limits[route])
+
+        for scope, (key, limit) in buckets.items():
+            result = await self.backend.hit(key, limit)
+            if not result.allowed:
+                RATE_LIMIT_REJECTIONS.inc((route, scope))
+                retry_after = max(1, math.ceil(result.retry_after))
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Demasiados intentos, intenta de nuevo en {retry_after} segundos",
+                    headers={"Retry-After": str(retry_after)},
+                )
+
+
+# Instancia global usada por routers.auth y routers.users
+rate_limiter = RateLimiter(
+    backend=InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS),
+    ip_limit=RateLimit.parse(settings.RATE_LIMIT_PER_IP),
+    email_limit=RateLimit.parse(settings.RATE_LIMIT_PER_EMAIL),
+    enabled=settings.RATE_LIMIT_ENABLED,
+    trust_forwarded_for=settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+    user_limits={"import_users": RateLimit.parse(settings.RATE_LIMIT_IMPORT_PER_USER)}
+)
@@ -0,0 +1,68 @@
+"""
+Ventanas de read-your-writes para el ruteo a la réplica de lectura
+
+Después de que un cliente escribe, sus lecturas van al primario durante
+READ_YOUR_WRITES_SECONDS para que no vea datos anteriores a su propio
+cambio mientras la réplica se pone al día. El cliente se identifica por un
+digest de su token (nunca se guarda el token). Las ventanas viven en
+memoria de cada proceso (TTL+LRU acotado).
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+
+from config import settings
+from utils.cache import TTLCache
+from utils.metrics import Counter
+
+DB_SESSION_ROUTING = Counter(
+    "db_session_routing_total",
+    "Sesiones de request por engine y motivo del ruteo",
+    ("target", "reason"),
+)
+
+
+def token_digest(token: str) -> str:
+    """Clave de la ventana para un token de acceso"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class ReadYourWrites:
+    """Registra qué clientes escribieron recientemente"""
+
+    def __init__(self, window_seconds: float, max_keys: int):
+        """
+        Args:
+            window_seconds (float): Duración de la ventana tras cada escritura
+            max_keys (int): Clientes recordados como máximo (LRU)
+        """
+        self.window_seconds = window_seconds
+        self._windows = TTLCache(max_size=max_keys, ttl_seconds=window_seconds)
+
+    @staticmethod
+    def key_for(request: Request) -> Optional[str]:
+        """Digest del bearer token de la request (None si no viene autenticada)"""
+        authorization = request.headers.get("authorization")
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return None
+        return token_digest(authorization[7:].strip())
+
+    def mark(self, key: Optional[str]) -> None:
+        """Abre (o extiende) la ventana del cliente"""
+        if key is not None and self.window_seconds > 0:
+            self._windows.set(key, True)
+
+    def is_active(self, key: Optional[str]) -> bool:
+        """Si el cliente escribió hace menos de window_seconds"""
+        return key is not None and self._windows.get(key) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"window_seconds": self.window_seconds, **self._windows.stats()}
+
+
+read_your_writes = ReadYourWrites(
+    window_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    max_keys=settings.READ_YOUR_WRITES_MAX_KEYS,
+)